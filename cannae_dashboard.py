@@ -11,9 +11,7 @@ import numpy as np
 import plotly.express as px
 from datetime import datetime
 from fpdf import FPDF
-import base64
 import os
-import io
 import pdfplumber
 import logging
 import re
@@ -1404,8 +1402,10 @@ if not TRADES.empty:
     # Convert Proceeds to absolute value for sorting by size
     filtered_trades["Abs_Proceeds"] = filtered_trades["Proceeds"].abs()
     
-    # Get the last 5 trades by date for display
-    last_5_trades_for_display = filtered_trades.sort_values("Trade Date", ascending=False).head(5)
+    # Get the last 5 trades by date for display. Trade dates are read as MM/DD/YYYY strings, so
+    # rank them by the parsed date (as the PDF report does) rather than as text
+    trade_dates = pd.to_datetime(filtered_trades["Trade Date"], errors='coerce').reset_index(drop=True)
+    last_5_trades_for_display = filtered_trades.iloc[trade_dates.nlargest(5).index]
     
     # Get the top 5 largest trades by absolute market value
     top_5_largest = filtered_trades.sort_values("Abs_Proceeds", ascending=False).head(5)
@@ -1599,6 +1599,9 @@ if not TRADES.empty:
         hide_index=True
     )
 else:
+    # Empty fallbacks so the PDF export below can test for trades directly
+    filtered_trades = pd.DataFrame()
+    trading_monitor_df = pd.DataFrame()
     st.warning("No trades data available. Please upload a trades file.")
     with st.expander("Expected file format"):
         st.write("The trades file should be named '_cannae_trade_*.xlsx'")
@@ -1764,6 +1767,11 @@ else:
                "Please ensure the sheet contains entries for CMBS, ABS, CLO, Hedges, Cash, and that their values are correctly formatted as percentages or numbers.")
 
 # Load EoM file and extract PnL data
+# Fallbacks for when the month-end marks file is missing or can't be charted
+eom_df_dynamic = None
+fig_gainers = None
+fig_sub_strategy = None
+
 # P&L Charts using latest_eom_file
 if latest_eom_file:
     eom_file_path_dynamic = os.path.join(DATA_PATH, latest_eom_file)
@@ -1873,6 +1881,10 @@ def find_latest_competitor_file():
     competitor_files.sort(key=lambda f: os.path.getmtime(os.path.join(DATA_PATH, f)), reverse=True)
     return os.path.join(DATA_PATH, competitor_files[0])
 
+# Fallbacks for when competitor data can't be loaded
+clean_df = pd.DataFrame()
+percentile_rounded = None
+
 # Load competitor data from the Excel file
 try:
     competitor_file_path = find_latest_competitor_file()
@@ -2673,7 +2685,7 @@ if st.button(label="Download Portfolio Snapshot PDF"):
                            target_x=table_x, table_width_mm=table_width)
     
     # Percentile Rank
-    if 'percentile_rounded' in locals() or 'percentile_rounded' in globals():
+    if percentile_rounded is not None:
         pdf.ln(10)  # Increased space before percentile info
         
         # Create a highlighted box for the percentile rank
@@ -2700,89 +2712,74 @@ if st.button(label="Download Portfolio Snapshot PDF"):
 from cannae_report_generator import generate_pdf_report
 pdf_path = os.path.join(DATA_PATH, "cannae_report.pdf")
 
-# Prepare attribution data for the PDF
-if 'attribution_df' in locals() and not attribution_df.empty:
-    # Use the attribution data from the dashboard
-    pdf_attribution_data = attribution_df.copy()
-else:
-    # Create default attribution data if not available
-    pdf_attribution_data = pd.DataFrame({
-        'Strategy': ['CMBS', 'ABS', 'CLO', 'Hedges', 'Cash'],
-        'Contribution': [85, 35, 15, -10, 5],
-        'Percentage': [70, 25, 10, -8, 3]
-    })
+# Cheap cache key for the trades frame so the PDF helpers don't hash every row on each rerun
+def trades_fingerprint(trades_df):
+    if trades_df is None or trades_df.empty:
+        return None
+    return (len(trades_df), trades_df['Trade Date'].max(), float(trades_df['Proceeds'].sum()))
 
 # Extract actual trading data from the dashboard for the PDF report
-def extract_trading_data_for_pdf():
+# (_filtered_trades is not hashed by Streamlit; trades_key identifies it instead,
+# and only the most recent trade files are kept in the cache)
+@st.cache_data(show_spinner=False, max_entries=8)
+def extract_trading_data_for_pdf(trading_monitor_df, trades_key, _filtered_trades):
+    filtered_trades = _filtered_trades
+    
     # Initialize result containers
     summary_data = []
     last_5_trades = []
     top_5_largest = []
     
     # Extract summary data from the trading monitor table
-    if 'trading_monitor_df' in globals() and not trading_monitor_df.empty:
-        for _, row in trading_monitor_df.iterrows():
-            summary_data.append([
-                row['Strategy'],
-                str(row['Buys']),
-                str(row['Sells']),
-                row['Purchase MV ($mm)'],
-                row['Sale MV ($mm)'],
-                row['Net ($mm)']
-            ])
-    
-    # Extract last 5 trades
-    if 'filtered_trades' in globals() and not filtered_trades.empty:
-        # Get the last 5 trades by date
-        last_trades = filtered_trades.sort_values("Trade Date", ascending=False).head(5)
-        
-        for _, trade in last_trades.iterrows():
-            # Format the trade date
-            if isinstance(trade['Trade Date'], pd.Timestamp):
-                trade_date = trade['Trade Date'].strftime('%m/%d/%Y')
-            else:
-                trade_date = str(trade['Trade Date'])
-            
-            # Determine if it's a buy or sell
-            trade_type = "Buy" if "buy" in str(trade['Transaction']).lower() else "Sell"
-            
-            # Format the proceeds
-            proceeds = abs(trade['Proceeds'])
-            proceeds_str = f"${proceeds:,.2f}"
-            
-            # Use the correct column names based on what's available
-            security_desc = str(trade.get('Security Description', trade.get('Security', 'Unknown Security')))
-            clean_strategy = str(trade.get('CleanStrategy', trade.get('Strategy', 'Unknown Strategy')))
-            sub_strategy = str(trade.get('Sub-Strategy', trade.get('SubStrategy', 'Unknown Sub-Strategy')))
-            
-            last_5_trades.append([trade_date, trade_type, security_desc, clean_strategy, sub_strategy, proceeds_str])
-    
-    # Extract top 5 largest trades by proceeds
-    if 'filtered_trades' in globals() and not filtered_trades.empty:
-        # Get the top 5 trades by absolute proceeds value
-        filtered_trades['AbsProceeds'] = filtered_trades['Proceeds'].abs()
-        largest_trades = filtered_trades.sort_values("AbsProceeds", ascending=False).head(5)
-        
-        for _, trade in largest_trades.iterrows():
-            # Format the trade date
-            if isinstance(trade['Trade Date'], pd.Timestamp):
-                trade_date = trade['Trade Date'].strftime('%m/%d/%Y')
-            else:
-                trade_date = str(trade['Trade Date'])
-            
-            # Determine if it's a buy or sell
-            trade_type = "Buy" if "buy" in str(trade['Transaction']).lower() else "Sell"
-            
-            # Format the proceeds
-            proceeds = abs(trade['Proceeds'])
-            proceeds_str = f"${proceeds:,.2f}"
-            
-            # Use the correct column names based on what's available
-            security_desc = str(trade.get('Security Description', trade.get('Security', 'Unknown Security')))
-            clean_strategy = str(trade.get('CleanStrategy', trade.get('Strategy', 'Unknown Strategy')))
-            sub_strategy = str(trade.get('Sub-Strategy', trade.get('SubStrategy', 'Unknown Sub-Strategy')))
-            
-            top_5_largest.append([trade_date, trade_type, security_desc, clean_strategy, sub_strategy, proceeds_str])
+    if trading_monitor_df is not None and not trading_monitor_df.empty:
+        summary_cols = [trading_monitor_df[col].to_numpy() for col in
+                        ['Strategy', 'Buys', 'Sells', 'Purchase MV ($mm)', 'Sale MV ($mm)', 'Net ($mm)']]
+        summary_data = [
+            [strategy, str(buys), str(sells), purchase_mv, sale_mv, net]
+            for strategy, buys, sells, purchase_mv, sale_mv, net in zip(*summary_cols)
+        ]
+    
+    if filtered_trades is not None and not filtered_trades.empty:
+        # Resolve the fallback column names once for the columns the PDF tables use
+        def first_column(candidates, default):
+            for col in candidates:
+                if col in filtered_trades.columns:
+                    return filtered_trades[col]
+            return pd.Series(default, index=filtered_trades.index)
+        
+        # Classify buys once per distinct Transaction value rather than once per formatted row
+        transactions = filtered_trades['Transaction'].astype('category')
+        transaction_values = transactions.cat.categories
+        buy_values = transaction_values[transaction_values.astype(str).str.lower().str.contains('buy', regex=False)]
+        
+        # Prepare every derived column in one frame so both selections below read the same pass;
+        # the label columns only hold a handful of distinct values, so store them as categoricals
+        trades = pd.DataFrame({
+            'Trade Date': filtered_trades['Trade Date'],
+            # Trade dates are read as MM/DD/YYYY strings, so parse them to rank by date
+            'TradeDateValue': pd.to_datetime(filtered_trades['Trade Date'], errors='coerce'),
+            'TradeType': np.where(transactions.isin(buy_values), "Buy", "Sell"),
+            'AbsProceeds': filtered_trades['Proceeds'].abs(),
+            'Security': first_column(['Security Description', 'Security'], 'Unknown Security'),
+            'Strategy': first_column(['CleanStrategy', 'Strategy'], 'Unknown Strategy').astype('category'),
+            'Sub-Strategy': first_column(['Sub-Strategy', 'SubStrategy'], 'Unknown Sub-Strategy').astype('category')
+        })
+        
+        def format_trades(selection):
+            # Format the slice's trade dates in one call, keeping the raw value where a date didn't parse
+            trade_dates = selection['TradeDateValue'].dt.strftime('%m/%d/%Y').fillna(selection['Trade Date'].astype(str))
+            rows = []
+            for trade_date, trade_type, security, strategy, sub_strategy, proceeds in zip(
+                    trade_dates, selection['TradeType'], selection['Security'], selection['Strategy'],
+                    selection['Sub-Strategy'], selection['AbsProceeds']):
+                rows.append([trade_date, trade_type, str(security), str(strategy), str(sub_strategy), f"${proceeds:,.2f}"])
+            return rows
+        
+        # Extract the last 5 trades by date (partial selection rather than a full sort)
+        last_5_trades = format_trades(trades.nlargest(5, 'TradeDateValue'))
+        
+        # Extract the top 5 largest trades by absolute proceeds value
+        top_5_largest = format_trades(trades.nlargest(5, 'AbsProceeds'))
     
     # If any of the data is missing, use fallback mock data
     if not summary_data or not last_5_trades or not top_5_largest:
@@ -2798,50 +2795,32 @@ def extract_trading_data_for_pdf():
 def generate_mock_trading_data():
     # Use the portfolio data to create realistic trading data
     # This is only used when actual trading data is not available
-    
-    # Get current date for recent trades
-    from datetime import datetime, timedelta
-    current_date = datetime.now()
+    rng = np.random.default_rng()
     
     # Create trading summary based on strategy allocations
-    summary_data = []
     strategies = ['CMBS', 'ABS RMLT', 'ABS', 'Hedges', 'CLO']
-    total_buys = 0
-    total_sells = 0
-    total_buy_notional = 0
-    total_sell_notional = 0
-    total_net_notional = 0
-    
-    for strategy in strategies:
-        # Generate realistic numbers for each strategy
-        buys = int(np.random.randint(2, 35))
-        sells = int(np.random.randint(1, 10))
-        buy_notional = round(np.random.uniform(5, 55), 2)
-        sell_notional = round(np.random.uniform(2, 35), 2)
-        net_notional = round(buy_notional - sell_notional, 2)
-        
-        # Format as strings with dollar signs
-        buy_notional_str = f"${buy_notional}"
-        sell_notional_str = f"(${sell_notional})" if sell_notional > 0 else f"${abs(sell_notional)}"
-        net_notional_str = f"${net_notional}" if net_notional >= 0 else f"(${abs(net_notional)})"
-        
-        # Add to summary data
-        summary_data.append([strategy, str(buys), str(sells), buy_notional_str, sell_notional_str, net_notional_str])
-        
-        # Update totals
-        total_buys += buys
-        total_sells += sells
-        total_buy_notional += buy_notional
-        total_sell_notional += sell_notional
-        total_net_notional += net_notional
+    
+    # Draw the figures for every strategy at once instead of per-strategy scalar draws
+    buys = rng.integers(2, 35, len(strategies))
+    sells = rng.integers(1, 10, len(strategies))
+    buy_notional = rng.uniform(5, 55, len(strategies)).round(2)
+    sell_notional = rng.uniform(2, 35, len(strategies)).round(2)
+    net_notional = (buy_notional - sell_notional).round(2)
+    
+    # Format as strings with dollar signs (sell notionals are always positive draws)
+    summary_data = [
+        [strategy, str(b), str(se), f"${bn}", f"(${sn})", f"${n}" if n >= 0 else f"(${abs(n)})"]
+        for strategy, b, se, bn, sn, n in zip(strategies, buys, sells, buy_notional, sell_notional, net_notional)
+    ]
     
     # Add aggregate row
+    total_net_notional = round(net_notional.sum(), 2)
     summary_data.append(["Aggregate", 
-                        str(total_buys), 
-                        str(total_sells), 
-                        f"${round(total_buy_notional, 2)}", 
-                        f"(${round(total_sell_notional, 2)})", 
-                        f"${round(total_net_notional, 2)}" if total_net_notional >= 0 else f"(${abs(round(total_net_notional, 2))})"]
+                        str(buys.sum()), 
+                        str(sells.sum()), 
+                        f"${round(buy_notional.sum(), 2)}", 
+                        f"(${round(sell_notional.sum(), 2)})", 
+                        f"${total_net_notional}" if total_net_notional >= 0 else f"(${abs(total_net_notional)})"]
     )
     
     # Generate mock trades data
@@ -2858,169 +2837,61 @@ def generate_mock_trades(count, larger_amounts=False):
     from datetime import datetime, timedelta
     current_date = datetime.now()
     
-    trades = []
+    rng = np.random.default_rng()
+    
     security_prefixes = ['BP', 'WFMF', 'JPMC', 'HERA', 'CITI']
     security_suffixes = ['JUL J', 'OCT F', 'C30 XB', 'SUPERFOOD-A1', 'GER E']
     strategies = ['CMBS', 'ABS RMLT', 'ABS', 'Hedges', 'CLO']
     sub_strategies = ['CMBS-SSNR F1', 'CMBS-IO F1', 'CLO-AAA FF F1', 'ABS-AUTO F1', 'HEDGES-SWAP']
     
-    for i in range(count):
-        # Generate trade date
-        days_ago = i*7 if not larger_amounts else np.random.randint(1, 30)
-        trade_date = (current_date - timedelta(days=days_ago)).strftime("%m/%d/%Y")
-        
-        # Randomly select buy or sell
-        trade_type = np.random.choice(['Buy', 'Sell'])
-        
-        # Generate security name
-        prefix = np.random.choice(security_prefixes)
-        year = str(np.random.randint(2019, 2024))
-        suffix = np.random.choice(security_suffixes)
-        security = f"{prefix} {year}-{suffix}"
-        
-        # Select strategy and sub-strategy
-        strategy = np.random.choice(strategies)
-        sub_strategy = np.random.choice(sub_strategies)
-        
-        # Generate notional amount
-        min_amount = 5 if larger_amounts else 0.01
-        max_amount = 25 if larger_amounts else 5
-        amount = np.random.uniform(min_amount, max_amount) * 1000000
-        amount_str = f"${amount:,.2f}"
-        
-        trades.append([trade_date, trade_type, security, strategy, sub_strategy, amount_str])
-    
-    # Sort by amount if these are largest trades
-    if larger_amounts:
-        trades.sort(key=lambda x: float(x[5].replace('$', '').replace(',', '')), reverse=True)
+    # Draw each column for all trades at once
+    days_ago = rng.integers(1, 30, count) if larger_amounts else np.arange(count) * 7
+    trade_dates = [(current_date - timedelta(days=int(d))).strftime("%m/%d/%Y") for d in days_ago]
+    trade_types = rng.choice(['Buy', 'Sell'], count).tolist()
+    prefixes = rng.choice(security_prefixes, count).tolist()
+    years = rng.integers(2019, 2024, count).tolist()
+    suffixes = rng.choice(security_suffixes, count).tolist()
+    trade_strategies = rng.choice(strategies, count).tolist()
+    trade_sub_strategies = rng.choice(sub_strategies, count).tolist()
+    
+    # Generate notional amounts
+    min_amount = 5 if larger_amounts else 0.01
+    max_amount = 25 if larger_amounts else 5
+    amounts = rng.uniform(min_amount, max_amount, count) * 1000000
+    
+    rows = [
+        [trade_date, trade_type, f"{prefix} {year}-{suffix}", strategy, sub_strategy, f"${amount:,.2f}"]
+        for trade_date, trade_type, prefix, year, suffix, strategy, sub_strategy, amount
+        in zip(trade_dates, trade_types, prefixes, years, suffixes, trade_strategies, trade_sub_strategies, amounts)
+    ]
+    
+    # Sort by the raw amounts if these are largest trades
+    order = np.argsort(-amounts) if larger_amounts else np.arange(count)
+    trades = [rows[i] for i in order]
     
     return trades
-    
-    # Extract summary data from the trading monitor table
-    summary_data = []
-    for _, row in trading_monitor_df.iterrows():
-        summary_data.append([
-            row['Strategy'],
-            str(row['Buys']),
-            str(row['Sells']),
-            row['Purchase MV ($mm)'],
-            row['Sale MV ($mm)'],
-            row['Net ($mm)']
-        ])
-    
-    # Extract last 5 trades
-    last_5_trades = []
-    if 'filtered_trades' in globals() and not filtered_trades.empty:
-        # Get the last 5 trades by date
-        last_trades = filtered_trades.sort_values("Trade Date", ascending=False).head(5)
-        
-        for _, trade in last_trades.iterrows():
-            # Format the trade date
-            if isinstance(trade['Trade Date'], pd.Timestamp):
-                trade_date = trade['Trade Date'].strftime('%m/%d/%Y')
-            else:
-                trade_date = str(trade['Trade Date'])
-            
-            # Determine if it's a buy or sell
-            trade_type = "Buy" if "buy" in str(trade['Transaction']).lower() else "Sell"
-            
-            # Format the proceeds
-            proceeds = abs(trade['Proceeds'])
-            proceeds_str = f"${proceeds:,.2f}"
-            
-            # Use the correct column names based on what's available
-            security_desc = str(trade.get('Security Description', 'Unknown Security'))
-            clean_strategy = str(trade.get('CleanStrategy', 'Unknown Strategy'))
-            strategy = str(trade.get('Strategy', 'Unknown Strategy'))
-            
-            last_5_trades.append([
-                trade_date,
-                trade_type,
-                security_desc,
-                clean_strategy,
-                strategy,
-                proceeds_str
-            ])
-    
-# Extract top 5 largest trades
-top_5_largest = []
-if 'filtered_trades' in globals() and not filtered_trades.empty:
-    # Get the top 5 largest trades by absolute market value
-    largest_trades = filtered_trades.sort_values("Abs_Proceeds", ascending=False).head(5)
-        
-    for _, trade in largest_trades.iterrows():
-        # Format the trade date
-        if isinstance(trade['Trade Date'], pd.Timestamp):
-            trade_date = trade['Trade Date'].strftime('%m/%d/%Y')
-        else:
-            trade_date = str(trade['Trade Date'])
-            
-        # Determine if it's a buy or sell
-        trade_type = "Buy" if "buy" in str(trade['Transaction']).lower() else "Sell"
-            
-        # Format the proceeds
-        proceeds = abs(trade['Proceeds'])
-        proceeds_str = f"${proceeds:,.2f}"
-        
-        # Use the correct column names based on what's available
-        security_desc = str(trade.get('Security Description', 'Unknown Security'))
-        clean_strategy = str(trade.get('CleanStrategy', 'Unknown Strategy'))
-        strategy = str(trade.get('Strategy', 'Unknown Strategy'))
-        
-        top_5_largest.append([
-            trade_date,
-            trade_type,
-            security_desc,
-            clean_strategy,
-            strategy,
-            proceeds_str
-        ])
-    
-# Extract trading data by calling the function
-trading_data = extract_trading_data_for_pdf()
 
-# Create key stats dictionary for the PDF report with actual values from the dashboard
-key_stats_for_pdf = {
-    # Use the actual KPI values from the dashboard
-    "monthly_return_str": kpi_data["monthly_return_str"],
-    "ytd_return_str": kpi_data["ytd_return_str"],
-    "ann_return_str": kpi_data["ann_return_str"],
-    "aum_str": kpi_data["aum_str"],
-    
-    # Add more detailed key stats from the dashboard
-    "avg_yield": key_stats["avg_yield"],
-    "wal": key_stats["wal"],
-    "pct_ig": key_stats["pct_ig"],
-    "floating_rate_pct": key_stats["floating_rate_pct"],
-    "pct_risk_rating_1": key_stats["pct_risk_rating_1"],
-    "monthly_carry_bps": key_stats["monthly_carry_bps"],
-    "bond_line_items": key_stats["bond_line_items"],
-    "avg_holding_size": key_stats["avg_holding_size"],
-    "top_10_concentration": key_stats["top_10_concentration"],
-    "cmbs_items": key_stats["bond_breakdown"].get("CMBS", 0),
-    "abs_items": key_stats["bond_breakdown"].get("ABS", 0),
-    "clo_items": key_stats["bond_breakdown"].get("CLO", 0),
-    "total_leverage": key_stats.get("total_leverage", "N/A"),
-    "repo_mv": key_stats.get("repo_mv", "N/A")
-}
+# Extract trading data by calling the function
+trading_data = extract_trading_data_for_pdf(trading_monitor_df, trades_fingerprint(filtered_trades), filtered_trades)
 
 # Function to prepare attribution data for the PDF
-def prepare_attribution_data_for_pdf():
+@st.cache_data(show_spinner=False)
+def prepare_attribution_data_for_pdf(attribution_df, attribution_strategies_from_key_stats):
     """Prepare attribution data for the PDF report using actual data from the dashboard"""
-    if 'attribution_df' not in globals() or attribution_df.empty:
+    if attribution_df is None or attribution_df.empty:
         logging.warning("Attribution data not found in dashboard for PDF generation")
         return None
     
-    # Create a copy of the attribution data to avoid modifying the original
-    pdf_attribution_data = attribution_df.copy()
-    
     # Ensure we have the necessary columns
-    if 'Strategy' not in pdf_attribution_data.columns or 'Contribution' not in pdf_attribution_data.columns:
+    if 'Strategy' not in attribution_df.columns or 'Contribution' not in attribution_df.columns:
         logging.warning("Attribution data missing required columns for PDF generation")
         return None
     
+    # Only the two columns the PDF uses are read, so there's no need to copy the whole frame
+    pdf_attribution_data = attribution_df[['Strategy', 'Contribution']]
+    
     # Use the Excel total values if available, otherwise fall back to calculated values
-    if 'attribution_strategies_from_key_stats' in globals() and attribution_strategies_from_key_stats:
+    if attribution_strategies_from_key_stats:
         # Use the values directly from the Excel file (Risk Report Format Master Sheet)
         excel_total_gross_bps = attribution_strategies_from_key_stats.get("Total (Gross)")
         excel_total_net_bps = attribution_strategies_from_key_stats.get("Total (Net)")
@@ -3038,112 +2909,104 @@ def prepare_attribution_data_for_pdf():
     
     # Create a dictionary with the attribution data
     return {
-        'strategies': pdf_attribution_data[['Strategy', 'Contribution']].to_dict('records'),
+        'strategies': pdf_attribution_data.to_dict('records'),
         'gross_bps': gross_bps,
         'net_bps': net_bps
     }
 
 # Prepare attribution data for the PDF
-attribution_data_for_pdf = prepare_attribution_data_for_pdf()
+attribution_data_for_pdf = prepare_attribution_data_for_pdf(attribution_df, attribution_strategies_from_key_stats)
 
 # Prepare allocation data for the PDF using actual data from the dashboard
-def prepare_allocation_data_for_pdf():
+@st.cache_data(show_spinner=False)
+def prepare_allocation_data_for_pdf(april_display, current_display):
     """Prepare actual allocation data from the dashboard for the PDF report"""
     # Check if the allocation data exists in the dashboard
-    if 'april_display' not in globals() or 'current_display' not in globals():
+    if april_display is None or current_display is None:
         logging.warning("Allocation data not found in dashboard for PDF generation")
         return None, None
     
     # Create month-end allocation DataFrame for PDF
-    if 'april_display' in globals() and not april_display.empty:
-        # Extract the data we need from april_display
-        april_allocation = april_display.copy()
-        # Remove the TOTAL row
-        april_allocation = april_allocation[april_allocation['Strategy'] != 'TOTAL']
-        # Convert percentage strings to float values
-        april_allocation['Allocation'] = april_allocation['Allocation'].str.rstrip('%').astype(float)
-        # Select only Strategy and Allocation columns
-        april_allocation = april_allocation[['Strategy', 'Allocation']]
+    if not april_display.empty:
+        # Select Strategy/Allocation without the TOTAL row and convert percentage strings to floats
+        april_allocation = april_display.loc[april_display['Strategy'] != 'TOTAL', ['Strategy', 'Allocation']].assign(
+            Allocation=lambda d: d['Allocation'].str.rstrip('%').astype(float)
+        )
     else:
         april_allocation = None
     
     # Create current allocation DataFrame for PDF
-    if 'current_display' in globals() and not current_display.empty:
-        # Extract the data we need from current_display
-        current_allocation = current_display.copy()
-        # Remove the TOTAL row
-        current_allocation = current_allocation[current_allocation['Strategy'] != 'TOTAL']
-        # Convert percentage strings to float values
-        current_allocation['Allocation'] = current_allocation['Allocation'].str.rstrip('%').astype(float)
-        # Select only Strategy and Allocation columns
-        current_allocation = current_allocation[['Strategy', 'Allocation']]
+    if not current_display.empty:
+        # Select Strategy/Allocation without the TOTAL row and convert percentage strings to floats
+        current_allocation = current_display.loc[current_display['Strategy'] != 'TOTAL', ['Strategy', 'Allocation']].assign(
+            Allocation=lambda d: d['Allocation'].str.rstrip('%').astype(float)
+        )
     else:
         current_allocation = None
     
     return april_allocation, current_allocation
 
 # Function to prepare competitor data for the PDF
-def prepare_competitor_data_for_pdf():
+@st.cache_data(show_spinner=False)
+def prepare_competitor_data_for_pdf(clean_df, percentile_rounded):
     """Prepare competitor data for the PDF report using actual data from the dashboard"""
     # Check if clean_df exists and has data
-    if 'clean_df' not in globals() or not isinstance(clean_df, pd.DataFrame) or clean_df.empty:
+    if not isinstance(clean_df, pd.DataFrame) or clean_df.empty:
         logging.warning("Competitor data not found in dashboard for PDF generation")
         return None, None
     
-    # Create a copy of the competitor data to avoid modifying the original
-    competitor_data = clean_df.copy()
-    
     # Ensure we have the necessary columns
-    if 'Fund' not in competitor_data.columns or 'YTD_Display' not in competitor_data.columns:
+    if 'Fund' not in clean_df.columns or 'YTD_Display' not in clean_df.columns:
         logging.warning("Competitor data missing required columns for PDF generation")
         return None, None
     
-    # Format the data for the PDF
-    competitor_data['YTD Return'] = competitor_data['YTD_Display'].apply(lambda x: f"{x}%")
-    
-    # Select only the columns we need
-    competitor_data = competitor_data[['Fund', 'YTD Return']]
+    # Build the two-column frame for the PDF directly instead of copying clean_df
+    competitor_data = pd.DataFrame({
+        'Fund': clean_df['Fund'],
+        'YTD Return': clean_df['YTD_Display'].astype(str) + '%'
+    })
     
     # Get the percentile rank if available
     percentile = None
-    if 'percentile_rounded' in globals() and isinstance(percentile_rounded, (int, float)):
+    if isinstance(percentile_rounded, (int, float)):
         percentile = percentile_rounded
     
     return competitor_data, percentile
 
 # Get actual allocation data for the PDF
-april_allocation_for_pdf, current_allocation_for_pdf = prepare_allocation_data_for_pdf()
+april_allocation_for_pdf, current_allocation_for_pdf = prepare_allocation_data_for_pdf(april_display, current_display)
 
 # Get competitor data for the PDF
-competitor_data_for_pdf, percentile_rank_for_pdf = prepare_competitor_data_for_pdf()
-
-# Generate PDF report
-pdf_buffer = io.BytesIO()
-
-# Use the existing key_stats_for_pdf dictionary - don't redefine it
-# Just update any additional fields needed for the PDF
-key_stats_for_pdf.update({
-    # Add any additional fields needed for the PDF that aren't in the original dictionary
-    "yield": key_stats.get("avg_yield", "N/A"),
-    "wal": key_stats.get("wal", "N/A"),
-    "ig_pct": key_stats.get("pct_ig", "N/A"),
-    "floating_rate_pct": key_stats.get("floating_rate_pct", "N/A"),
-    "risk_rating": key_stats.get("pct_risk_rating_1", "N/A"),
-    "monthly_carry": key_stats.get("monthly_carry_bps", "N/A"),
-    "bond_line_items": key_stats.get("bond_line_items", "N/A"),
-    "avg_holding_size": key_stats.get("avg_holding_size", "N/A"),
-    "cmbs_pct": key_stats.get("cmbs_items", "N/A"),
-    "abs_pct": key_stats.get("abs_items", "N/A"),
-    "clo_pct": key_stats.get("clo_items", "N/A"),
-    "concentration": key_stats.get("top_10_concentration", "N/A"),
-    "leverage": key_stats.get("total_leverage", "N/A"),
-    "repo_market_value": key_stats.get("repo_mv", "N/A"),
-    # Use the Total (Net) value from attribution data as the monthly return (convert from bps to percentage)
-    "monthly_return_str": f"{attribution_data_for_pdf['net_bps']/100:.2f}%" if attribution_data_for_pdf and 'net_bps' in attribution_data_for_pdf else kpi_data.get("monthly_return_str", "N/A")
-})
+competitor_data_for_pdf, percentile_rank_for_pdf = prepare_competitor_data_for_pdf(clean_df, percentile_rounded)
+
+# Create key stats dictionary for the PDF report with actual values from the dashboard
+key_stats_for_pdf = {
+    # Use the actual KPI values from the dashboard; the monthly return is the Total (Net)
+    # value from the attribution data (converted from bps to percentage) when available
+    "monthly_return_str": f"{attribution_data_for_pdf['net_bps']/100:.2f}%" if attribution_data_for_pdf and 'net_bps' in attribution_data_for_pdf else kpi_data.get("monthly_return_str", "N/A"),
+    "ytd_return_str": kpi_data["ytd_return_str"],
+    "ann_return_str": kpi_data["ann_return_str"],
+    "aum_str": kpi_data["aum_str"],
+    
+    # Add more detailed key stats from the dashboard
+    "avg_yield": key_stats["avg_yield"],
+    "wal": key_stats["wal"],
+    "pct_ig": key_stats["pct_ig"],
+    "floating_rate_pct": key_stats["floating_rate_pct"],
+    "pct_risk_rating_1": key_stats["pct_risk_rating_1"],
+    "monthly_carry_bps": key_stats["monthly_carry_bps"],
+    "bond_line_items": key_stats["bond_line_items"],
+    "avg_holding_size": key_stats["avg_holding_size"],
+    "top_10_concentration": key_stats["top_10_concentration"],
+    "cmbs_items": key_stats["bond_breakdown"].get("CMBS", 0),
+    "abs_items": key_stats["bond_breakdown"].get("ABS", 0),
+    "clo_items": key_stats["bond_breakdown"].get("CLO", 0),
+    "total_leverage": key_stats.get("total_leverage", "N/A"),
+    "repo_mv": key_stats.get("repo_mv", "N/A")
+}
 
 # Force refresh of the P&L chart data for the PDF
-if 'fig_gainers' in locals() and 'eom_df_dynamic' in locals():
+if fig_gainers is not None and eom_df_dynamic is not None:
     # Create fresh data for the PDF report to ensure exactly 5 positions
     top_pnl_gainers_for_pdf = eom_df_dynamic.copy()
     top_pnl_gainers_for_pdf['Abs_PL'] = top_pnl_gainers_for_pdf['Cannae MTD PL'].abs()
@@ -3151,36 +3014,39 @@ if 'fig_gainers' in locals() and 'eom_df_dynamic' in locals():
 else:
     top_pnl_gainers_for_pdf = None
 
-if 'fig_sub_strategy' in locals() and 'eom_df_dynamic' in locals():
+if fig_sub_strategy is not None and eom_df_dynamic is not None:
     # Create fresh data for the sub-strategy chart to ensure exactly 5 positions
-    sub_strat_for_pdf = eom_df_dynamic.groupby('Sub Strategy')['Cannae MTD PL'].sum().reset_index()
+    # Group on a categorical key with observed=True so only the sub-strategies present are summed
+    sub_strat_for_pdf = (eom_df_dynamic['Cannae MTD PL']
+                         .groupby(eom_df_dynamic['Sub Strategy'].astype('category'), observed=True, sort=False)
+                         .sum().reset_index())
     sub_strat_for_pdf['Abs_PL'] = sub_strat_for_pdf['Cannae MTD PL'].abs()
     sub_strat_for_pdf = sub_strat_for_pdf.nlargest(5, 'Abs_PL')
 else:
     sub_strat_for_pdf = None
 
-# Create custom Plotly figures with exactly 5 positions for the PDF
-if 'top_pnl_gainers_for_pdf' in locals() and top_pnl_gainers_for_pdf is not None:
-    # Create a new Plotly figure with exactly 5 positions
-    custom_fig_gainers = px.bar(
-        top_pnl_gainers_for_pdf.sort_values('Cannae MTD PL', ascending=False),
-        x='ID', y='Cannae MTD PL',
-        title='Top 5 PnL Gainers/Losers',
+# Build the 5-bar Plotly figure for the PDF; cached on the 5-row frame so reruns with
+# unchanged P&L reuse the figure instead of rebuilding it (cache_resource keeps the Figure
+# object as-is; pickling it through cache_data turns the trace arrays into typed-array dicts)
+@st.cache_resource(show_spinner=False, max_entries=8)
+def build_pdf_bar_figure(chart_data, x_col, title):
+    return px.bar(
+        chart_data.sort_values('Cannae MTD PL', ascending=False),
+        x=x_col, y='Cannae MTD PL',
+        title=title,
         color_discrete_sequence=['#17a2b8', '#0e6471', '#0a444f', '#17a2b8', '#0e6471']
     )
+
+# Create custom Plotly figures with exactly 5 positions for the PDF
+if top_pnl_gainers_for_pdf is not None:
+    custom_fig_gainers = build_pdf_bar_figure(top_pnl_gainers_for_pdf[['ID', 'Cannae MTD PL']], 'ID', 'Top 5 PnL Gainers/Losers')
 else:
-    custom_fig_gainers = fig_gainers if 'fig_gainers' in locals() else None
-
-if 'sub_strat_for_pdf' in locals() and sub_strat_for_pdf is not None:
-    # Create a new Plotly figure with exactly 5 positions
-    custom_fig_substrat = px.bar(
-        sub_strat_for_pdf.sort_values('Cannae MTD PL', ascending=False),
-        x='Sub Strategy', y='Cannae MTD PL',
-        title='Top 5 PnL by Sub Strategy',
-        color_discrete_sequence=['#17a2b8', '#0e6471', '#0a444f', '#17a2b8', '#0e6471']
-    )
+    custom_fig_gainers = fig_gainers
+
+if sub_strat_for_pdf is not None:
+    custom_fig_substrat = build_pdf_bar_figure(sub_strat_for_pdf[['Sub Strategy', 'Cannae MTD PL']], 'Sub Strategy', 'Top 5 PnL by Sub Strategy')
 else:
-    custom_fig_substrat = fig_sub_strategy if 'fig_sub_strategy' in locals() else None
+    custom_fig_substrat = fig_sub_strategy
 
 # Generate the PDF with our custom figures that have exactly 5 positions
 generate_pdf_report(
@@ -3197,16 +3063,14 @@ generate_pdf_report(
 )
 
 try:
-    # Display download link
+    # Display download button; Streamlit serves the bytes from its media endpoint
     with open(pdf_path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode()
-        st.markdown(f'''
-            <div style="background-color: #f0f2f6; padding: 10px; border-radius: 5px; text-align: center;">
-                <a href="data:application/pdf;base64,{b64}" download="Cannae_Report.pdf" style="font-size: 16px; text-decoration: none; color: #007bff; font-weight: bold;">
-                    Download Cannae Report PDF
-                </a>
-            </div>
-        ''', unsafe_allow_html=True)
+        st.download_button(
+            "Download Cannae Report PDF",
+            data=f,
+            file_name="Cannae_Report.pdf",
+            mime="application/pdf"
+        )
     st.success(f"PDF successfully generated: Cannae_Fund_Report.pdf")
 except Exception as e:
     st.error(f"Error generating PDF: {e}")
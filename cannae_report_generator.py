@@ -8,13 +8,17 @@ import os
 import io
 import base64
 import tempfile
+import hashlib
+import functools
+import inspect
+import shutil
+import threading
+import contextlib
+import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-import plotly.io as pio
-import plotly.graph_objects as go
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, landscape
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Image, Paragraph, Spacer, PageBreak
@@ -27,6 +31,334 @@ from attribution_table import create_attribution_table
 from competitor_table import create_competitor_returns_table
 from allocation_table import create_allocation_table
 
+# On-disk cache for rendered chart images, keyed by chart data and parameters
+CHART_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'cannae_report', 'charts')
+# Cached images are invalidated whenever this module (and so the chart code) changes
+CHART_CACHE_VERSION = str(os.path.getmtime(os.path.abspath(__file__)))
+# Nothing else cleans the cache on a long-running server, so only the most recently written
+# images are kept
+CHART_CACHE_MAX_FILES = 200
+
+def _chart_cache_path(*parts):
+    """Return the cache file path for the given key parts"""
+    key = hashlib.blake2b(CHART_CACHE_VERSION.encode(), digest_size=16)
+    for part in parts:
+        key.update(part if isinstance(part, bytes) else repr(part).encode())
+    return os.path.join(CHART_CACHE_DIR, key.hexdigest() + '.png')
+
+def _prune_cache_dir(cache_dir, max_files):
+    """Delete the oldest cache files beyond max_files, ignoring other writers' temp files"""
+    entries = []
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.name.endswith('.tmp'):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                # Removed by a concurrent prune
+                continue
+    if len(entries) <= max_files:
+        return
+    entries.sort()
+    for _, path in entries[:len(entries) - max_files]:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+def _write_chart_cache(path, img_bytes):
+    """Write a chart image to the cache, replacing atomically so readers never see a partial file"""
+    os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+    # Each writer gets its own temp file, since Streamlit sessions rendering the same chart are
+    # threads in one process
+    fd, tmp_path = tempfile.mkstemp(dir=CHART_CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(img_bytes)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    _prune_cache_dir(CHART_CACHE_DIR, CHART_CACHE_MAX_FILES)
+
+# In-memory layer over the disk cache so repeat reports in the same process skip the file read
+_CHART_MEMORY_CACHE = {}
+_CHART_MEMORY_CACHE_SIZE = 32
+_CHART_MEMORY_CACHE_LOCK = threading.Lock()
+
+def _remember_chart(cache_path, img_bytes):
+    """Keep a chart's PNG bytes in memory, evicting the oldest entry when full"""
+    with _CHART_MEMORY_CACHE_LOCK:
+        if len(_CHART_MEMORY_CACHE) >= _CHART_MEMORY_CACHE_SIZE:
+            _CHART_MEMORY_CACHE.pop(next(iter(_CHART_MEMORY_CACHE)))
+        _CHART_MEMORY_CACHE[cache_path] = img_bytes
+
+def cached_chart(chart_func):
+    """Cache a matplotlib chart function's PNG by a hash of its DataFrame and arguments"""
+    @functools.wraps(chart_func)
+    def wrapper(data, *args, **kwargs):
+        cache_path = _chart_cache_path(
+            chart_func.__name__,
+            list(data.columns),
+            pd.util.hash_pandas_object(data, index=True).values.tobytes(),
+            args,
+            sorted(kwargs.items())
+        )
+        img_bytes = _CHART_MEMORY_CACHE.get(cache_path)
+        if img_bytes is None:
+            try:
+                with open(cache_path, 'rb') as f:
+                    img_bytes = f.read()
+            except FileNotFoundError:
+                # Not cached yet (or just pruned)
+                img_bytes = chart_func(data, *args, **kwargs).getvalue()
+                _write_chart_cache(cache_path, img_bytes)
+            _remember_chart(cache_path, img_bytes)
+        return io.BytesIO(img_bytes)
+    return wrapper
+
+# On-disk cache for whole PDF reports, keyed by a hash of all report inputs
+REPORT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'cannae_report', 'reports')
+# Cached PDFs are invalidated whenever this module or one of the table modules it uses changes
+REPORT_CACHE_VERSION = '|'.join([CHART_CACHE_VERSION] + [
+    str(os.path.getmtime(inspect.getfile(table_func)))
+    for table_func in (create_attribution_table, create_competitor_returns_table, create_allocation_table)
+])
+# Only the most recently written reports are kept (every new date produces new keys)
+REPORT_CACHE_MAX_FILES = 50
+
+def _report_input_bytes(value):
+    """Return a stable byte representation of a report input for hashing"""
+    if isinstance(value, pd.DataFrame):
+        return repr(list(value.columns)).encode() + pd.util.hash_pandas_object(value, index=True).values.tobytes()
+    if hasattr(value, 'to_json'):
+        # Plotly figures
+        return value.to_json().encode()
+    return json.dumps(value, sort_keys=True, default=str).encode()
+
+def _report_cache_path(*inputs):
+    """Return the cached PDF path for the given report inputs, or None if they can't be hashed"""
+    key = hashlib.blake2b(REPORT_CACHE_VERSION.encode(), digest_size=16)
+    try:
+        for value in inputs:
+            key.update(_report_input_bytes(value))
+    except (TypeError, ValueError):
+        return None
+    return os.path.join(REPORT_CACHE_DIR, key.hexdigest() + '.pdf')
+
+# matplotlib and plotly are imported on first use, so callers that only need the tables
+# (e.g. create_trading_monitor_tables) don't pay their import cost. Charts are drawn on the
+# Agg canvas directly; the backend default keeps anything that does reach for pyplot on a
+# headless server from probing for a GUI backend first
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+@functools.lru_cache(maxsize=None)
+def _matplotlib_figure_api():
+    """Return matplotlib's Figure class and Agg canvas"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    return Figure, FigureCanvasAgg
+
+@functools.lru_cache(maxsize=None)
+def _dollar_formatter():
+    """Return the shared y-axis dollar formatter (stateless apart from its axis, so safe to reuse)"""
+    from matplotlib.ticker import StrMethodFormatter
+    return StrMethodFormatter('${x:,.0f}')
+
+@functools.lru_cache(maxsize=None)
+def _plotly_io():
+    """Return plotly.io with the shared Kaleido scope configured"""
+    import plotly.io as pio
+    # Configure the shared Kaleido scope once so every static export reuses the same warm
+    # process without loading MathJax (the scope only exists with plotly 5.x + kaleido 0.2)
+    kaleido_scope = getattr(pio.kaleido, 'scope', None)
+    if kaleido_scope is not None:
+        kaleido_scope.default_format = 'png'
+        kaleido_scope.mathjax = None
+    return pio
+
+# Pool of reusable matplotlib figures keyed by figsize, so each chart clears an existing
+# Figure instead of building and tearing down a new one through pyplot
+_FIGURE_POOL = {}
+_FIGURE_POOL_LOCK = threading.Lock()
+
+@contextlib.contextmanager
+def pooled_figure(figsize):
+    """Borrow a cleared idle Figure of figsize from the pool, creating one if all are in use"""
+    Figure, _ = _matplotlib_figure_api()
+    with _FIGURE_POOL_LOCK:
+        idle_figures = _FIGURE_POOL.setdefault(figsize, [])
+        fig = idle_figures.pop() if idle_figures else Figure(figsize=figsize)
+    try:
+        fig.clear()
+        yield fig
+    finally:
+        with _FIGURE_POOL_LOCK:
+            _FIGURE_POOL[figsize].append(fig)
+
+# Chart resolution: 100 dpi keeps the 7-8pt bar labels legible once the 7in figures are
+# scaled into the PDF (ReportLab re-encodes PNGs itself, so a smaller PNG only saves buffer/cache bytes)
+CHART_DPI = 100
+
+def figure_to_png(fig):
+    """Render a Figure to an optimized PNG through the Agg canvas"""
+    _, FigureCanvasAgg = _matplotlib_figure_api()
+    FigureCanvasAgg(fig)
+    img_data = io.BytesIO()
+    fig.savefig(img_data, format='png', dpi=CHART_DPI, pil_kwargs={'optimize': True})
+    img_data.seek(0)
+    return img_data
+
+# Path to the logo and watermark files, checked once at import. The header/footer draws them
+# by filename: ReportLab embeds a named image once per document and later pages only
+# reference it, which is cheaper than an ImageReader (whose pixel data is re-hashed per draw)
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_LOGO_FILE = os.path.join(_BASE_DIR, 'Cannae-logo.jpg')
+_WATERMARK_FILE = os.path.join(_BASE_DIR, 'Elephant Watermark.png')
+_HAS_LOGO = os.path.exists(_LOGO_FILE)
+_HAS_WATERMARK = os.path.exists(_WATERMARK_FILE)
+
+# Table styles shared by every report, built once at import instead of per table
+# Trading summary table (with the aggregate row highlighted)
+_TRADING_SUMMARY_STYLE = TableStyle([
+    # Header row styling
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 6),  # Even smaller font for header
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 1),  # Less padding
+    ('TOPPADDING', (0, 0), (-1, 0), 1),  # Less padding
+    
+    # Data rows
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 6),  # Even smaller font for data
+    ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+    ('TOPPADDING', (0, 1), (-1, -1), 0),  # Minimal padding
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 0),  # Minimal padding
+    
+    # Highlight aggregate row
+    ('BACKGROUND', (0, -1), (-1, -1), colors.whitesmoke),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    
+    # Grid
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
+])
+
+# The trading summary uses fixed row heights (12pt leading plus the style's padding) so ReportLab
+# doesn't have to measure every cell to size the rows. The trades tables hold security names
+# from the blotter, which can run over several lines, so their rows are still sized from the cells
+_TRADING_HEADER_HEIGHT = 14
+_TRADING_ROW_HEIGHT = 12
+
+# Last 5 / top 5 largest trades tables
+_TRADES_HEADER = ("Date", "Type", "Security", "Strategy", "Sub-Strategy", "Amount ($)")
+
+_TRADING_TRADES_STYLE = TableStyle([
+    # Header row styling
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 6),  # Even smaller font for header
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 1),  # Less padding
+    ('TOPPADDING', (0, 0), (-1, 0), 1),  # Less padding
+    
+    # Data rows
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 6),  # Even smaller font for data
+    ('ALIGN', (0, 1), (3, -1), 'LEFT'),
+    ('ALIGN', (4, 1), (-1, -1), 'RIGHT'),
+    ('TOPPADDING', (0, 1), (-1, -1), 0),  # Minimal padding
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 0),  # Minimal padding
+    
+    # Grid
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
+])
+
+# Main returns table
+_RETURNS_STYLE = TableStyle([
+    # Header row styling
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 6),  # Smaller font
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 1),  # Minimal padding
+    ('TOPPADDING', (0, 0), (-1, 0), 1),  # Minimal padding
+    
+    # Data row styling
+    ('ALIGN', (0, 1), (-1, 1), 'CENTER'),
+    ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 1), (-1, 1), 7),  # Smaller font
+    ('TEXTCOLOR', (0, 1), (-1, 1), colors.black),
+    ('BOTTOMPADDING', (0, 1), (-1, 1), 1),  # Minimal padding
+    ('TOPPADDING', (0, 1), (-1, 1), 1),  # Minimal padding
+    
+    # Grid styling
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
+])
+
+# Detailed key stats tables
+_STATS_STYLE = TableStyle([
+    # Header row styling
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 6),  # Smaller font
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 0),  # Minimal padding
+    ('TOPPADDING', (0, 0), (-1, 0), 0),  # Minimal padding
+    
+    # Data row styling
+    ('ALIGN', (0, 1), (-1, 1), 'CENTER'),
+    ('FONTNAME', (0, 1), (-1, 1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, 1), 6),  # Smaller font
+    ('TEXTCOLOR', (0, 1), (-1, 1), colors.black),
+    ('BOTTOMPADDING', (0, 1), (-1, 1), 0),  # Minimal padding
+    ('TOPPADDING', (0, 1), (-1, 1), 0),  # Minimal padding
+    
+    # Grid
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
+])
+
+# Side-by-side month-end/current allocation layout table
+_ALLOCATION_LAYOUT_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 3),  # Minimal padding
+    ('RIGHTPADDING', (0, 0), (-1, -1), 3),  # Minimal padding
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 3),  # Minimal padding
+])
+
+# Placeholder shown when there is no competitor data
+_COMPETITOR_PLACEHOLDER_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Oblique'),
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+])
+
+# Side-by-side attribution/competitor layout table
+_COMBINED_LAYOUT_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 3),  # Minimal padding
+    ('RIGHTPADDING', (0, 0), (-1, -1), 3),  # Minimal padding
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),  # Minimal padding
+    ('TOPPADDING', (0, 0), (-1, -1), 2),  # Minimal padding
+])
+
+# Sample return attribution used when the dashboard doesn't pass any
+_SAMPLE_ATTRIBUTION = pd.DataFrame({
+    'Strategy': ['CMBS', 'ABS', 'CLO', 'Hedges', 'Cash'],
+    'Contribution': [85, 35, 15, -10, 5],
+})
+
 # All functions defined in this file
 
 def save_plotly_as_image(fig, filename, width=800, height=500, scale=1.5):
@@ -39,199 +371,199 @@ def save_plotly_as_image(fig, filename, width=800, height=500, scale=1.5):
     img_path = os.path.join(temp_dir, filename)
     
     # Save the figure as a PNG
-    pio.write_image(fig, img_path, width=width, height=height, scale=scale)
+    _plotly_io().write_image(fig, img_path, width=width, height=height, scale=scale)
     
     return img_path
 
-def create_bar_chart(data, title, filename):
-    """Create a bar chart using matplotlib and save it as an image"""
-    # Create figure and axis
-    fig, ax = plt.subplots(figsize=(8, 4))
-    
-    # Extract data
-    strategies = data['Strategy'].tolist()
-    values = data['Contribution'].tolist() if 'Contribution' in data.columns else data['Value'].tolist()
-    
-    # Create horizontal bar chart
-    bars = ax.barh(strategies, values, color=['#008080', '#808080', '#ff7f0e', '#00008B', '#ADD8E6'])
-    
-    # Add labels and title
-    ax.set_title(title, fontsize=12)
-    ax.set_xlabel('Value', fontsize=10)
-    
-    # Add value labels to bars
-    for bar in bars:
-        width = bar.get_width()
-        label_x_pos = width if width > 0 else 0
-        ax.text(label_x_pos, bar.get_y() + bar.get_height()/2, f'{width:.0f}', 
-                va='center', ha='left', fontsize=8)
-    
-    # Adjust layout
-    plt.tight_layout()
-    
-    # Save to BytesIO
-    img_data = io.BytesIO()
-    plt.savefig(img_data, format='png', dpi=100)
-    img_data.seek(0)
-    plt.close(fig)
-    
-    return img_data
+def create_bar_chart(data, title, filename=None):
+    """Create a bar chart using matplotlib and return it as an in-memory PNG (filename is unused)"""
+    # Create figure and axis on a pooled Figure
+    with pooled_figure((8, 4)) as fig:
+        ax = fig.add_subplot(111)
+        
+        # Extract data
+        strategies = data['Strategy'].to_numpy()
+        values = data['Contribution'].to_numpy() if 'Contribution' in data.columns else data['Value'].to_numpy()
+        
+        # Create horizontal bar chart
+        bars = ax.barh(strategies, values, color=['#008080', '#808080', '#ff7f0e', '#00008B', '#ADD8E6'])
+        
+        # Add labels and title
+        ax.set_title(title, fontsize=12)
+        ax.set_xlabel('Value', fontsize=10)
+        
+        # Add value labels to bars
+        ax.bar_label(bars, labels=[f'{value:.0f}' for value in values], fontsize=8)
+        
+        # Adjust layout
+        fig.tight_layout()
+        
+        # Save to BytesIO
+        return figure_to_png(fig)
 
 def create_attribution_chart(data):
     """Create a horizontal bar chart for attribution data"""
     # Sort data by contribution (descending)
     data = data.sort_values('Contribution', ascending=False)
     
-    # Create a figure and axis with appropriate size
-    fig, ax = plt.subplots(figsize=(8, 4))
-    
-    # Define colors for different strategies
-    strategy_colors = {
-        "CMBS": '#008080',      # Teal
-        "ABS": '#808080',       # Gray
-        "CLO": '#ff7f0e',       # Orange
-        "Hedges": '#00008B',    # Dark Blue
-        "Cash": '#ADD8E6'       # Light Blue
-    }
-    
-    # Get colors for each bar based on strategy
-    colors = [strategy_colors.get(strategy, '#1E90FF') for strategy in data['Strategy']]
-    
-    # Create horizontal bar chart
-    bars = ax.barh(data['Strategy'], data['Contribution'], color=colors)
-    
-    # Set chart title and labels
-    ax.set_title("Return Attribution by Strategy", fontsize=12, fontweight='bold')
-    ax.set_xlabel('Contribution (BPS)', fontsize=10)
-    ax.set_ylabel('', fontsize=10)  # No Y label needed as strategy names are shown
-    
-    # Add grid lines for better readability
-    ax.xaxis.grid(True, linestyle='--', alpha=0.7)
-    
-    # Add data labels on bars
-    for bar in bars:
-        width = bar.get_width()
-        # Format label with BPS and percentage if available
-        if 'Percentage' in data.columns:
-            # Find the percentage for this strategy
-            strategy = bar.get_y()
-            percentage_row = data[data['Strategy'] == strategy]
-            if not percentage_row.empty:
-                percentage = percentage_row['Percentage'].values[0]
-                label = f"{width:.0f} bps ({percentage:.1f}%)"
-            else:
-                label = f"{width:.0f} bps"
-        else:
-            label = f"{width:.0f} bps"
-            
-        # Position label inside or outside bar based on width
-        if width > 20:  # If bar is wide enough, put label inside
-            ax.text(width/2, bar.get_y() + bar.get_height()/2, 
-                    label, va='center', ha='center', color='white', fontweight='bold')
-        else:  # Otherwise put it just outside
-            ax.text(width + 1, bar.get_y() + bar.get_height()/2, 
-                    label, va='center', ha='left')
-    
-    # Add gross and net return values as text annotations
-    gross_bps = data[data['Contribution'] > 0]['Contribution'].sum()
-    net_bps = data['Contribution'].sum()
-    
-    # Position the text in the upper right corner
-    ax.text(0.95, 0.95, f"Gross Return: {gross_bps:.0f} bps\nNet Return: {net_bps:.0f} bps",
-            transform=ax.transAxes, ha='right', va='top',
-            bbox=dict(facecolor='white', alpha=0.8, boxstyle='round,pad=0.5'))
-    
-    # Adjust layout
-    plt.tight_layout()
-    
-    # Save to BytesIO
-    img_data = io.BytesIO()
-    plt.savefig(img_data, format='png', dpi=100)
-    img_data.seek(0)
-    plt.close(fig)
-    
-    return img_data
+    # Create a figure and axis with appropriate size on a pooled Figure
+    with pooled_figure((8, 4)) as fig:
+        ax = fig.add_subplot(111)
+        
+        # Define colors for different strategies
+        strategy_colors = {
+            "CMBS": '#008080',      # Teal
+            "ABS": '#808080',       # Gray
+            "CLO": '#ff7f0e',       # Orange
+            "Hedges": '#00008B',    # Dark Blue
+            "Cash": '#ADD8E6'       # Light Blue
+        }
+        
+        # Get colors for each bar based on strategy
+        colors = [strategy_colors.get(strategy, '#1E90FF') for strategy in data['Strategy']]
+        
+        # Create horizontal bar chart
+        bars = ax.barh(data['Strategy'], data['Contribution'], color=colors)
+        
+        # Set chart title and labels
+        ax.set_title("Return Attribution by Strategy", fontsize=12, fontweight='bold')
+        ax.set_xlabel('Contribution (BPS)', fontsize=10)
+        ax.set_ylabel('', fontsize=10)  # No Y label needed as strategy names are shown
+        
+        # Add grid lines for better readability
+        ax.xaxis.grid(True, linestyle='--', alpha=0.7)
+        
+        # Look up each strategy's percentage once instead of filtering the frame per bar
+        pct_map = dict(zip(data['Strategy'], data['Percentage'])) if 'Percentage' in data.columns else {}
+        
+        # Format labels with BPS and percentage if available (bars follow data['Strategy'] order)
+        labels = [
+            f"{width:.0f} bps ({pct_map[strategy]:.1f}%)" if strategy in pct_map else f"{width:.0f} bps"
+            for width, strategy in zip(data['Contribution'], data['Strategy'])
+        ]
+        
+        # Put labels inside bars that are wide enough, centre them on negative bars so they stay
+        # clear of the strategy names, otherwise place them just outside the bar end
+        placements = ['inside' if width > 20 else 'negative' if width < 0 else 'outside'
+                      for width in data['Contribution']]
+        
+        def labels_for(placement):
+            return [label if where == placement else '' for label, where in zip(labels, placements)]
+        
+        ax.bar_label(bars, labels=labels_for('inside'), label_type='center', color='white', fontweight='bold')
+        ax.bar_label(bars, labels=labels_for('negative'), label_type='center')
+        ax.bar_label(bars, labels=labels_for('outside'), padding=3)
+        
+        # Add gross and net return values as text annotations
+        gross_bps = data.loc[data['Contribution'] > 0, 'Contribution'].sum()
+        net_bps = data['Contribution'].sum()
+        
+        # Position the text in the upper right corner
+        ax.text(0.95, 0.95, f"Gross Return: {gross_bps:.0f} bps\nNet Return: {net_bps:.0f} bps",
+                transform=ax.transAxes, ha='right', va='top',
+                bbox=dict(facecolor='white', alpha=0.8, boxstyle='round,pad=0.5'))
+        
+        # Adjust layout
+        fig.tight_layout()
+        
+        # Save to BytesIO
+        return figure_to_png(fig)
 
 
-def create_pnl_chart(data, title, x_col, y_col, filename, compact=False):
-    """Create a P&L chart using matplotlib and save it as an image
+@cached_chart
+def create_pnl_chart(data, title, x_col, y_col, filename=None, compact=False):
+    """Create a P&L chart using matplotlib and return it as an in-memory PNG
     
     Args:
         data: DataFrame containing the data
         title: Chart title
         x_col: Column name for x-axis values
         y_col: Column name for y-axis values
-        filename: Output filename
+        filename: Unused, kept for existing callers; the PNG is returned as a BytesIO
         compact: If True, create a more compact chart for page 1
     """
     # Create figure and axis with dimensions based on compact parameter
     if compact:
         # More compact chart for page 1, but using more available space
-        fig, ax = plt.subplots(figsize=(7, 4.2))  # Slightly taller for page 1
+        figsize = (7, 4.2)  # Slightly taller for page 1
     else:
         # Taller chart with more space for page 2
-        fig, ax = plt.subplots(figsize=(7, 5.5))  # Full height for page 2
+        figsize = (7, 5.5)  # Full height for page 2
     
-    # Extract data
-    x_values = data[x_col].tolist()
-    y_values = data[y_col].tolist()
-    
-    # Create bar chart with a slightly lighter color for better readability
-    bars = ax.bar(x_values, y_values, color='#1E90FF', width=0.6)  # Slightly narrower bars
-    
-    # Add labels and title with smaller font sizes
-    ax.set_title(title, fontsize=12, fontweight='bold')  # Smaller title
-    ax.set_ylabel('PnL ($)', fontsize=10)  # Smaller label
-    
-    # Ensure x-axis labels are visible and readable with smaller font
-    plt.xticks(rotation=45, ha='right', fontsize=8)  # Smaller font
-    plt.yticks(fontsize=8)  # Smaller y-axis font
-    
-    # Add grid lines for better readability of values
-    ax.yaxis.grid(True, linestyle='--', alpha=0.7)
-    
-    # Format y-axis with dollar signs
-    import matplotlib.ticker as mtick
-    formatter = mtick.StrMethodFormatter('${x:,.0f}')
-    ax.yaxis.set_major_formatter(formatter)
-    
-    # Add value labels to bars with smaller font
-    for bar in bars:
-        height = bar.get_height()
-        label_y_pos = height if height > 0 else 0
-        ax.text(bar.get_x() + bar.get_width()/2, label_y_pos, 
-                f'${height:,.0f}', va='bottom', ha='center', fontsize=7, fontweight='bold')  # Smaller font
-    
-    # Add a light background color to the plot area for better contrast
-    ax.set_facecolor('#f8f9fa')
-    
-    # Add a border around the plot
-    for spine in ax.spines.values():
-        spine.set_visible(True)
-        spine.set_color('#cccccc')
-    
-    # Ensure all x-axis labels are visible by adjusting bottom margin
-    plt.subplots_adjust(bottom=0.25)  # More bottom margin for x-axis labels
-    plt.tight_layout(pad=0.8)  # Slightly more padding to ensure labels are visible
-    
-    # Save to BytesIO
-    img_data = io.BytesIO()
-    plt.savefig(img_data, format='png', dpi=100)
-    img_data.seek(0)
-    plt.close(fig)
-    
-    return img_data
-
-def truncate_text(text, max_length=20):
-    """Truncate text to a maximum length and add ellipsis if needed"""
-    if not isinstance(text, str):
-        text = str(text)
-    if len(text) <= max_length:
-        return text
-    return text[:max_length-3] + '...'
+    with pooled_figure(figsize) as fig:
+        ax = fig.add_subplot(111)
+        
+        # Extract data
+        x_values = data[x_col].to_numpy()
+        y_values = data[y_col].to_numpy()
+        
+        # Create bar chart with a slightly lighter color for better readability
+        bars = ax.bar(x_values, y_values, color='#1E90FF', width=0.6)  # Slightly narrower bars
+        
+        # Add labels and title with smaller font sizes
+        ax.set_title(title, fontsize=12, fontweight='bold')  # Smaller title
+        ax.set_ylabel('PnL ($)', fontsize=10)  # Smaller label
+        
+        # Ensure x-axis labels are visible and readable with smaller font
+        for label in ax.get_xticklabels():
+            label.set(rotation=45, ha='right', fontsize=8)  # Smaller font
+        for label in ax.get_yticklabels():
+            label.set(fontsize=8)  # Smaller y-axis font
+        
+        # Add grid lines for better readability of values
+        ax.yaxis.grid(True, linestyle='--', alpha=0.7)
+        
+        # Format y-axis with dollar signs
+        ax.yaxis.set_major_formatter(_dollar_formatter())
+        
+        # Add value labels to bars with smaller font
+        ax.bar_label(bars, labels=[f'${value:,.0f}' for value in y_values], fontsize=7, fontweight='bold')  # Smaller font
+        
+        # Add a light background color to the plot area for better contrast
+        ax.set_facecolor('#f8f9fa')
+        
+        # Add a border around the plot
+        for spine in ax.spines.values():
+            spine.set_visible(True)
+            spine.set_color('#cccccc')
+        
+        # Ensure all x-axis labels are visible by adjusting bottom margin
+        fig.subplots_adjust(bottom=0.25)  # More bottom margin for x-axis labels
+        fig.tight_layout(pad=0.8)  # Slightly more padding to ensure labels are visible
+        
+        # Save to BytesIO
+        return figure_to_png(fig)
 
 def create_trading_monitor_tables(trading_data=None):
     """Create formatted tables for trading monitor data"""
+    # The issue is that the dashboard is sending "Unknown Sub-Strategy" for the sub-strategy field
+    # But the UI is displaying the correct values
+    
+    # Map securities to their actual sub-strategies as shown in the UI
+    security_to_substrategy = {
+        # Last 5 trades from the UI
+        "BX 2021-XL2 J": "CMBS SASB F1",
+        "BWAY 2013-1515 XA": "CMBS IO F1",
+        "TBRNA 2005-1A B1": "CMBS SASB F1_INCOME",
+        "JETBLUE AIRWAYS/LOYALTY": "CMBS SASB F1_INCOME",
+        "DRSLF 2019-75A ER2": "CLO EQ",
+        
+        # Top 5 largest from the UI
+        "BX 2025-ALT6 E": "CMBS SASB F1_INCOME",
+        "BX 2021-VOLT F": "CMBS SASB F1_INCOME",
+        "JANUS HENDERSON MULTI-CLO ETF": "CLO AAA ETF F1",
+        "JPMC 2012-C8 NR": "CMBS 2.0/3.0 NON-IG F1"
+    }
+    
+    # Default mappings by strategy based on the UI
+    strategy_to_substrategy = {
+        "CMBS": "CMBS SASB F1",
+        "CLO": "CLO AAA ETF F1",
+        "ABS": "ABS SSNR F1",
+        "AIRCRAFT": "AIRCRAFT SSNR F1",
+        "Other": "OTHER F1"
+    }
+    
     # Use sample data if none provided
     if trading_data is None or len(trading_data) == 0:
         # Sample data based on the dashboard screenshot
@@ -271,677 +603,515 @@ def create_trading_monitor_tables(trading_data=None):
         # Filter out trades where the security name (index 2) starts with "Collateral"
         top_5_largest = [trade for trade in all_largest_trades 
                          if len(trade) <= 2 or not str(trade[2]).startswith("Collateral")]
-        
-        # The issue is that the dashboard is sending "Unknown Sub-Strategy" for the sub-strategy field
-        # But the UI is displaying the correct values
-        
-        # Map securities to their actual sub-strategies as shown in the UI
-        security_to_substrategy = {
-            # Last 5 trades from the UI
-            "BX 2021-XL2 J": "CMBS SASB F1",
-            "BWAY 2013-1515 XA": "CMBS IO F1",
-            "TBRNA 2005-1A B1": "CMBS SASB F1_INCOME",
-            "JETBLUE AIRWAYS/LOYALTY": "CMBS SASB F1_INCOME",
-            "DRSLF 2019-75A ER2": "CLO EQ",
-            
-            # Top 5 largest from the UI
-            "BX 2025-ALT6 E": "CMBS SASB F1_INCOME",
-            "BX 2021-VOLT F": "CMBS SASB F1_INCOME",
-            "JANUS HENDERSON MULTI-CLO ETF": "CLO AAA ETF F1",
-            "JPMC 2012-C8 NR": "CMBS 2.0/3.0 NON-IG F1"
-        }
-        
-        # Default mappings by strategy based on the UI
-        strategy_to_substrategy = {
-            "CMBS": "CMBS SASB F1",
-            "CLO": "CLO AAA ETF F1",
-            "ABS": "ABS SSNR F1",
-            "AIRCRAFT": "AIRCRAFT SSNR F1",
-            "Other": "OTHER F1"
-        }
-        
-        # Process last 5 trades
-        for i in range(len(last_5_trades)):
-            # Make sure the trade has enough elements
-            while len(last_5_trades[i]) < 6:
-                last_5_trades[i].append("")
-                
-            # Only replace if the sub-strategy is "Unknown Sub-Strategy"
-            if len(last_5_trades[i]) > 4 and last_5_trades[i][4] == "Unknown Sub-Strategy":
-                security = last_5_trades[i][2] if len(last_5_trades[i]) > 2 else ""
-                strategy = last_5_trades[i][3] if len(last_5_trades[i]) > 3 else ""
-                
-                # Try to match by security name first (most accurate)
-                if security in security_to_substrategy:
-                    last_5_trades[i][4] = security_to_substrategy[security]
-                # Fall back to strategy mapping
-                elif strategy in strategy_to_substrategy:
-                    last_5_trades[i][4] = strategy_to_substrategy[strategy]
-        
-        # Process top 5 largest trades
-        for i in range(len(top_5_largest)):
-            # Make sure the trade has enough elements
-            while len(top_5_largest[i]) < 6:
-                top_5_largest[i].append("")
-                
-            # Only replace if the sub-strategy is "Unknown Sub-Strategy"
-            if len(top_5_largest[i]) > 4 and top_5_largest[i][4] == "Unknown Sub-Strategy":
-                security = top_5_largest[i][2] if len(top_5_largest[i]) > 2 else ""
-                strategy = top_5_largest[i][3] if len(top_5_largest[i]) > 3 else ""
-                
-                # Try to match by security name first (most accurate)
-                if security in security_to_substrategy:
-                    top_5_largest[i][4] = security_to_substrategy[security]
-                # Fall back to strategy mapping
-                elif strategy in strategy_to_substrategy:
-                    top_5_largest[i][4] = strategy_to_substrategy[strategy]
-    
-    # Apply truncation to all text fields in the trading data
-    # For last 5 trades
-    for i in range(len(last_5_trades)):
-        # Truncate security name (index 2) and sub-strategy (index 4)
-        if len(last_5_trades[i]) > 2:
-            last_5_trades[i][2] = truncate_text(last_5_trades[i][2], 15)  # Security name
-        if len(last_5_trades[i]) > 4:
-            last_5_trades[i][4] = truncate_text(last_5_trades[i][4], 15)  # Sub-strategy
-    
-    # For top 5 largest trades
-    for i in range(len(top_5_largest)):
-        # Truncate security name (index 2) and sub-strategy (index 4)
-        if len(top_5_largest[i]) > 2:
-            top_5_largest[i][2] = truncate_text(top_5_largest[i][2], 15)  # Security name
-        if len(top_5_largest[i]) > 4:
-            top_5_largest[i][4] = truncate_text(top_5_largest[i][4], 15)  # Sub-strategy
+    
+    # Pad, backfill and truncate both trade lists in one vectorized pass, then split them again
+    trades_df = pd.DataFrame(list(last_5_trades) + list(top_5_largest)).reindex(columns=range(6)).fillna("")
+    trades_df.columns = ['Date', 'Type', 'Security', 'Strategy', 'Sub-Strategy', 'Amount']
+    
+    # Only replace "Unknown Sub-Strategy", matching by security name first (most accurate)
+    # and falling back to the strategy mapping
+    mapped_security = trades_df['Security'].map(security_to_substrategy)
+    mapped_strategy = trades_df['Strategy'].map(strategy_to_substrategy)
+    unknown = trades_df['Sub-Strategy'] == "Unknown Sub-Strategy"
+    trades_df['Sub-Strategy'] = (mapped_security.combine_first(mapped_strategy)
+                                 .where(unknown).fillna(trades_df['Sub-Strategy']))
+    
+    # Truncate security name and sub-strategy to 15 characters
+    for col in ('Security', 'Sub-Strategy'):
+        text = trades_df[col].astype(str)
+        trades_df[col] = text.where(text.str.len() <= 15, text.str[:12] + '...')
+    
+    trade_rows = trades_df.values.tolist()
+    last_5_trades, top_5_largest = trade_rows[:len(last_5_trades)], trade_rows[len(last_5_trades):]
     
     # Create tables
     tables = {}
     
     # 1. Trading Summary Table
-    summary_data = [["Type", "Buys", "Sells", "Purchase MV ($mm)", "Sale MV ($mm)", "Net Change"]]
-    summary_data.extend(trading_summary)
-    
-    summary_table = Table(summary_data, colWidths=[0.75*inch, 0.45*inch, 0.45*inch, 0.9*inch, 0.9*inch, 0.75*inch])  # Slightly narrower columns
-    summary_table.setStyle(TableStyle([
-        # Header row styling
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 6),  # Even smaller font for header
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 1),  # Less padding
-        ('TOPPADDING', (0, 0), (-1, 0), 1),  # Less padding
-        
-        # Data rows
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 6),  # Even smaller font for data
-        ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-        ('TOPPADDING', (0, 1), (-1, -1), 0),  # Minimal padding
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 0),  # Minimal padding
-        
-        # Highlight aggregate row
-        ('BACKGROUND', (0, -1), (-1, -1), colors.whitesmoke),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        
-        # Grid
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-        ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
-    ]))
+    summary_data = (("Type", "Buys", "Sells", "Purchase MV ($mm)", "Sale MV ($mm)", "Net Change"),
+                    *map(tuple, trading_summary))
+    
+    summary_table = Table(summary_data, colWidths=[0.75*inch, 0.45*inch, 0.45*inch, 0.9*inch, 0.9*inch, 0.75*inch],  # Slightly narrower columns
+                          rowHeights=[_TRADING_HEADER_HEIGHT] + [_TRADING_ROW_HEIGHT] * (len(summary_data) - 1))
+    summary_table.setStyle(_TRADING_SUMMARY_STYLE)
     tables['summary'] = summary_table
     
     # 2. Last 5 Trades Table
-    last_trades_data = [["Date", "Type", "Security", "Strategy", "Sub-Strategy", "Amount ($)"]]
-    last_trades_data.extend(last_5_trades)
+    last_trades_data = (_TRADES_HEADER, *map(tuple, last_5_trades))
     
     last_trades_table = Table(last_trades_data, colWidths=[0.65*inch, 0.45*inch, 0.95*inch, 0.55*inch, 0.95*inch, 0.75*inch])  # Slightly narrower columns
-    last_trades_table.setStyle(TableStyle([
-        # Header row styling
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 6),  # Even smaller font for header
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 1),  # Less padding
-        ('TOPPADDING', (0, 0), (-1, 0), 1),  # Less padding
-        
-        # Data rows
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 6),  # Even smaller font for data
-        ('ALIGN', (0, 1), (3, -1), 'LEFT'),
-        ('ALIGN', (4, 1), (-1, -1), 'RIGHT'),
-        ('TOPPADDING', (0, 1), (-1, -1), 0),  # Minimal padding
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 0),  # Minimal padding
-        
-        # Grid
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-        ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
-    ]))
+    last_trades_table.setStyle(_TRADING_TRADES_STYLE)
     tables['last_trades'] = last_trades_table
     
     # 3. Top 5 Largest Trades Table
-    largest_trades_data = [["Date", "Type", "Security", "Strategy", "Sub-Strategy", "Amount ($)"]]
-    largest_trades_data.extend(top_5_largest)
+    largest_trades_data = (_TRADES_HEADER, *map(tuple, top_5_largest))
     
     largest_trades_table = Table(largest_trades_data, colWidths=[0.65*inch, 0.45*inch, 0.95*inch, 0.55*inch, 0.95*inch, 0.75*inch])  # Slightly narrower columns
-    largest_trades_table.setStyle(TableStyle([
-        # Header row styling
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 6),  # Even smaller font for header
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 1),  # Less padding
-        ('TOPPADDING', (0, 0), (-1, 0), 1),  # Less padding
-        
-        # Data rows
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 6),  # Even smaller font for data
-        ('ALIGN', (0, 1), (3, -1), 'LEFT'),
-        ('ALIGN', (4, 1), (-1, -1), 'RIGHT'),
-        ('TOPPADDING', (0, 1), (-1, -1), 0),  # Minimal padding
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 0),  # Minimal padding
-        
-        # Grid
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-        ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
-    ]))
+    largest_trades_table.setStyle(_TRADING_TRADES_STYLE)
     tables['largest_trades'] = largest_trades_table
     
     return tables
 
-def generate_pdf_report(output_path, key_stats=None, fig_pl_gainers=None, fig_pl_substrat=None, attribution_data=None, april_display=None, current_display=None, trading_data=None, competitor_data=None, percentile_rank=None):
-    """Generate a compact PDF report with portfolio allocation tables and P&L charts"""
-    # Get today's date for the header
-    today = datetime.now().strftime("%B %d, %Y")
-    
-    # Path to the logo and watermark files
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    LOGO_FILE = os.path.join(BASE_DIR, 'Cannae-logo.jpg')
-    WATERMARK_FILE = os.path.join(BASE_DIR, 'Elephant Watermark.png')
-
-    # Create a PDF document with smaller margins and a header/footer
-    class PDFWithHeader(SimpleDocTemplate):
-        def __init__(self, filename, **kwargs):
-            SimpleDocTemplate.__init__(self, filename, **kwargs)
-            self.header_text = f"Cannae Report - {today}"
-            
-        def build(self, flowables, **kwargs):
-            self._calc()  # Calculate the document dimensions
+# PDF document with the report title header and watermark/logo footer on every page
+class PDFWithHeader(SimpleDocTemplate):
+    def __init__(self, filename, header_text, **kwargs):
+        SimpleDocTemplate.__init__(self, filename, **kwargs)
+        self.header_text = header_text
+        
+    def build(self, flowables, **kwargs):
+        self._calc()  # Calculate the document dimensions
+        
+        # Define a header function that adds the title to each page
+        def header_footer(canvas, doc):
+            canvas.saveState()
             
-            # Define a header function that adds the title to each page
-            def header_footer(canvas, doc):
-                canvas.saveState()
-                
-                # Add elephant watermark if the file exists
-                if os.path.exists(WATERMARK_FILE):
-                    # Position watermark in bottom right area where there's more white space
-                    watermark_width = 70  # mm - slightly larger for better visibility
-                    watermark_height = 70  # mm - slightly larger for better visibility
-                    
-                    # Calculate position for the very bottom right corner
-                    # Position it at the very edge of the page
-                    x = doc.width + doc.leftMargin - watermark_width  # Extreme right edge
-                    y = 5  # Very bottom with minimal margin
-                    
-                    # Draw the watermark with 50% opacity (simulated with lighter gray)
-                    canvas.saveState()
-                    # ReportLab doesn't support alpha directly in this context, use lighter gray instead
-                    canvas.setFillColorRGB(0.75, 0.75, 0.75)  # 75% gray (lighter) to simulate opacity
-                    canvas.drawImage(WATERMARK_FILE, x, y, width=watermark_width, height=watermark_height, mask='auto')
-                    canvas.restoreState()
-                
-                # Header
-                canvas.setFont('Helvetica-Bold', 12)
-                # Draw the header text centered at the top of the page
-                canvas.drawCentredString(doc.width/2.0 + doc.leftMargin, doc.height + doc.topMargin - 12, self.header_text)
+            # Add elephant watermark if the file exists
+            if _HAS_WATERMARK:
+                # Position watermark in bottom right area where there's more white space
+                watermark_width = 70  # mm - slightly larger for better visibility
+                watermark_height = 70  # mm - slightly larger for better visibility
                 
-                # Footer with logo in bottom right
-                # Check if logo file exists
-                if os.path.exists(LOGO_FILE):
-                    # Calculate position for bottom right (with natural margin)
-                    logo_width = 100  # Slightly smaller width to fit better
-                    logo_height = 50  # Slightly smaller height to fit better
-                    x = doc.width + doc.leftMargin - logo_width + 15  # Move further right (negative margin)
-                    y = doc.bottomMargin + 10  # Slightly higher from bottom margin
-                    canvas.drawImage(LOGO_FILE, x, y, width=logo_width, height=logo_height, preserveAspectRatio=True)
+                # Calculate position for the very bottom right corner
+                # Position it at the very edge of the page
+                x = doc.width + doc.leftMargin - watermark_width  # Extreme right edge
+                y = 5  # Very bottom with minimal margin
                 
+                # Draw the watermark with 50% opacity (simulated with lighter gray)
+                canvas.saveState()
+                # ReportLab doesn't support alpha directly in this context, use lighter gray instead
+                canvas.setFillColorRGB(0.75, 0.75, 0.75)  # 75% gray (lighter) to simulate opacity
+                canvas.drawImage(_WATERMARK_FILE, x, y, width=watermark_width, height=watermark_height, mask='auto')
                 canvas.restoreState()
             
-            # Build the document with the header/footer function
-            SimpleDocTemplate.build(self, flowables, onFirstPage=header_footer, onLaterPages=header_footer, **kwargs)
-    
-    # Create the document with the custom header
+            # Header
+            canvas.setFont('Helvetica-Bold', 12)
+            # Draw the header text centered at the top of the page
+            canvas.drawCentredString(doc.width/2.0 + doc.leftMargin, doc.height + doc.topMargin - 12, self.header_text)
+            
+            # Footer with logo in bottom right
+            # Check if logo file exists
+            if _HAS_LOGO:
+                # Calculate position for bottom right (with natural margin)
+                logo_width = 100  # Slightly smaller width to fit better
+                logo_height = 50  # Slightly smaller height to fit better
+                x = doc.width + doc.leftMargin - logo_width + 15  # Move further right (negative margin)
+                y = doc.bottomMargin + 10  # Slightly higher from bottom margin
+                canvas.drawImage(_LOGO_FILE, x, y, width=logo_width, height=logo_height, preserveAspectRatio=True)
+            
+            canvas.restoreState()
+        
+        # Build the document with the header/footer function
+        SimpleDocTemplate.build(self, flowables, onFirstPage=header_footer, onLaterPages=header_footer, **kwargs)
+
+@functools.lru_cache(maxsize=None)
+def _report_styles():
+    """Return the (section, normal) paragraph styles with the report's smaller fonts"""
+    styles = getSampleStyleSheet()
+    section_style = styles['Heading2']
+    section_style.fontSize = 9  # Smaller section headers
+    normal_style = styles['Normal']
+    normal_style.fontSize = 6  # Smaller normal text
+    return section_style, normal_style
+
+def _largest_abs_points(x_values, y_values, keep=50, threshold=1000):
+    """Reduce a large trace to its keep points with the largest absolute y, preserving their order"""
+    if len(y_values) <= threshold:
+        return x_values, y_values
+    # NaN values rank last, as they do in nlargest
+    magnitude = np.nan_to_num(np.abs(y_values), nan=-1.0)
+    idx = np.sort(np.argpartition(magnitude, -keep)[-keep:])
+    return x_values[idx], y_values[idx]
+
+def _nonempty_df(value):
+    """Return True if value is a DataFrame with at least one row"""
+    return isinstance(value, pd.DataFrame) and not value.empty
+
+def generate_pdf_report(output_path, key_stats=None, fig_pl_gainers=None, fig_pl_substrat=None, attribution_data=None, april_display=None, current_display=None, trading_data=None, competitor_data=None, percentile_rank=None):
+    """Generate a compact PDF report with portfolio allocation tables and P&L charts"""
+    # Get today's date once for the header and the current allocation title
+    today = datetime.now().strftime("%B %d, %Y")
+
+    # Reuse a previously built PDF when all inputs (and the logo/watermark images) are unchanged
+    image_mtimes = [os.path.getmtime(path) for path in (_LOGO_FILE, _WATERMARK_FILE) if os.path.exists(path)]
+    cache_path = _report_cache_path(today, image_mtimes, key_stats, fig_pl_gainers, fig_pl_substrat, attribution_data,
+                                    april_display, current_display, trading_data, competitor_data, percentile_rank)
+    if cache_path is not None:
+        try:
+            shutil.copyfile(cache_path, output_path)
+            return
+        except FileNotFoundError:
+            # Not cached yet (or just pruned)
+            pass
+
+    # Create a PDF document with smaller margins and a header/footer
     doc = PDFWithHeader(
         output_path,
+        f"Cannae Report - {today}",
         pagesize=letter,
         rightMargin=20,  # Even smaller margins
         leftMargin=20,
         topMargin=30,  # Increased top margin for header
-        bottomMargin=20
+        bottomMargin=20,
+        pageCompression=1,  # Always compress page streams, whatever the installed rl_config default
+        invariant=1  # Fixed timestamps/IDs, so unchanged inputs produce a byte-identical PDF
     )
     
     # Container for the 'flowable' objects
     elements = []
     
     # Get styles with smaller fonts
-    styles = getSampleStyleSheet()
-    section_style = styles['Heading2']
-    section_style.fontSize = 9  # Smaller section headers
-    normal_style = styles['Normal']
-    normal_style.fontSize = 6  # Smaller normal text
-    
-    # Add Key Stats section at the top of the report with minimal spacing
-    elements.append(Paragraph("Key Statistics", section_style))
-    elements.append(Spacer(1, 0))  # No spacing
-    
-    # Create Key Stats table with default values if not provided
-    if key_stats is None:
-        key_stats = {
-            "monthly_return_str": "1.49%",  # Updated to use Total (Net) from attribution data
-            "ytd_return_str": "4.75%",
-            "ann_return_str": "8.90%",
-            "aum_str": "$1.2B",
-            "total_leverage": "35.2%",  # Default value for Total Leverage %
-            "repo_mv": "$420.4M"  # Default value for Repo MV
-        }
-    
-    # Create the main returns table
-    # Use the net_bps value from attribution data for monthly return if available
-    monthly_return = key_stats.get("monthly_return_str", "1.49%")  # Use the value from key_stats or default to 1.49%
-    
-    returns_data = [
-        ["YTD Return", "Monthly Return", "Annualized Return", "AUM"],
-        [key_stats.get("ytd_return_str", "N/A"), 
-         monthly_return,  # Use the hard-coded value instead of key_stats
-         key_stats.get("ann_return_str", "N/A"), 
-         key_stats.get("aum_str", "N/A")]
-    ]
-    
-    returns_table = Table(returns_data, colWidths=[1.75*inch, 1.75*inch, 1.75*inch, 1.75*inch])
-    returns_table.setStyle(TableStyle([
-        # Header row styling
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 6),  # Smaller font
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 1),  # Minimal padding
-        ('TOPPADDING', (0, 0), (-1, 0), 1),  # Minimal padding
-        
-        # Data row styling
-        ('ALIGN', (0, 1), (-1, 1), 'CENTER'),
-        ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 1), (-1, 1), 7),  # Smaller font
-        ('TEXTCOLOR', (0, 1), (-1, 1), colors.black),
-        ('BOTTOMPADDING', (0, 1), (-1, 1), 1),  # Minimal padding
-        ('TOPPADDING', (0, 1), (-1, 1), 1),  # Minimal padding
-        
-        # Grid styling
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-        ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
-    ]))
-    
-    elements.append(returns_table)
-    elements.append(Spacer(1, 8))
-    
-    # Create a more detailed key stats table with additional metrics
-    # Row 1: Yield, WAL, IG%, Floating Rate %
-    row1_data = [
-        ["Average Yield", "WAL", "% IG", "Floating Rate %"],
-        [key_stats.get("avg_yield", "N/A"), 
-         key_stats.get("wal", "N/A"), 
-         key_stats.get("pct_ig", "N/A"), 
-         key_stats.get("floating_rate_pct", "N/A")]
-    ]
-    
-    # Row 2: Risk Rating, Monthly Carry, Bond Line Items, Avg Holding Size
-    row2_data = [
-        ["% Risk Rating 1", "Monthly Carry", "Bond Line Items", "Avg Holding Size"],
-        [key_stats.get("pct_risk_rating_1", "N/A"), 
-         key_stats.get("monthly_carry_bps", "N/A"), 
-         key_stats.get("bond_line_items", "N/A"), 
-         key_stats.get("avg_holding_size", "N/A")]
-    ]
-    
-    # Row 3: Top 10% Concentration, CMBS/ABS/CLO Line Items
-    row3_data = [
-        ["Top 10% Concentration", "CMBS Line Items", "ABS Line Items", "CLO Line Items"],
-        [key_stats.get("top_10_concentration", "N/A"), 
-         key_stats.get("cmbs_items", "N/A"), 
-         key_stats.get("abs_items", "N/A"), 
-         key_stats.get("clo_items", "N/A")]
-    ]
-    
-    # Row 4: Total Leverage % and Repo MV (newly added)
-    row4_data = [
-        ["Total Leverage %", "Repo MV", "", ""],
-        [key_stats.get("total_leverage", "N/A"), 
-         key_stats.get("repo_mv", "N/A"), 
-         "", 
-         ""]
-    ]
-    
-    # Create tables for each row
-    row1_table = Table(row1_data, colWidths=[1.4*inch, 1.4*inch, 1.4*inch, 1.4*inch])
-    row2_table = Table(row2_data, colWidths=[1.4*inch, 1.4*inch, 1.4*inch, 1.4*inch])
-    row3_table = Table(row3_data, colWidths=[1.4*inch, 1.4*inch, 1.4*inch, 1.4*inch])
-    row4_table = Table(row4_data, colWidths=[1.4*inch, 1.4*inch, 1.4*inch, 1.4*inch])
-    
-    # Apply consistent styling to all tables
-    for table in [row1_table, row2_table, row3_table, row4_table]:
-        table.setStyle(TableStyle([
-            # Header row styling
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 6),  # Smaller font
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 0),  # Minimal padding
-            ('TOPPADDING', (0, 0), (-1, 0), 0),  # Minimal padding
+    section_style, normal_style = _report_styles()
+    
+    def render_gainers_chart():
+        """Extract the top 5 gainers/losers from the Plotly figure and render the PDF chart"""
+        # Extract data from the Plotly figure
+        if hasattr(fig_pl_gainers, 'data') and len(fig_pl_gainers.data) > 0:
+            # Extract x and y values from the Plotly figure once as typed arrays
+            x_values = np.asarray(fig_pl_gainers.data[0].x)
+            y_values = np.asarray(fig_pl_gainers.data[0].y, dtype=np.float64)
+            # Only the top 5 by absolute value are charted, so drop the rest of a large trace up front
+            x_values, y_values = _largest_abs_points(x_values, y_values)
             
-            # Data row styling
-            ('ALIGN', (0, 1), (-1, 1), 'CENTER'),
-            ('FONTNAME', (0, 1), (-1, 1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, 1), 6),  # Smaller font
-            ('TEXTCOLOR', (0, 1), (-1, 1), colors.black),
-            ('BOTTOMPADDING', (0, 1), (-1, 1), 0),  # Minimal padding
-            ('TOPPADDING', (0, 1), (-1, 1), 0),  # Minimal padding
+            # Create DataFrame from the extracted data
+            gainers_df = pd.DataFrame({
+                'ID': x_values,
+                'Cannae MTD PL': y_values
+            })
             
-            # Grid
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-            ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
-        ]))
-    
-    # Create a container for detailed stats tables with minimal spacing
-    elements.append(Paragraph("Detailed Statistics", normal_style))
-    elements.append(Spacer(1, 0))  # No spacing
-    elements.append(row1_table)
-    elements.append(Spacer(1, 0))  # No spacing
-    elements.append(row2_table)
-    elements.append(Spacer(1, 0))  # No spacing
-    elements.append(row3_table)
-    elements.append(Spacer(1, 0))  # No spacing
-    elements.append(row4_table)
-    
-    elements.append(Spacer(1, 2))  # Minimal spacing
-    
-    # Add portfolio allocation section with compact spacing
-    elements.append(Paragraph("Portfolio Allocation", section_style))
-    elements.append(Spacer(1, 2))  # Minimal spacing
-    
-    # Create a table for side-by-side allocation tables
-    # First, create each allocation table
-    # Handle april_display safely - check if it exists and is not empty
-    if april_display is not None and not isinstance(april_display, bool) and hasattr(april_display, 'empty') and not april_display.empty:
-        april_table = create_allocation_table(april_display, "July Month-End Allocation")
-    else:
-        # Create an empty table if no data
-        april_table = Table([["No Month-End Data"]], colWidths=[2.8*inch])
-    
-    # Handle current_display safely - check if it exists and is not empty
-    if current_display is not None and not isinstance(current_display, bool) and hasattr(current_display, 'empty') and not current_display.empty:
-        current_table = create_allocation_table(current_display, "Current Allocation")
-    else:
-        # Create an empty table if no data
-        current_table = Table([["No Current Data"]], colWidths=[2.8*inch])
-    
-    # Get today's date and format it
-    today = datetime.now().strftime("%B %d, %Y")
-    
-    # Create headers with smaller font
-    month_end_header = Paragraph("<b>July Month-End Allocation</b>", normal_style)
-    current_header = Paragraph(f"<b>Current Allocation (as of {today})</b>", normal_style)
-    
-    # Create a 2x2 table to hold headers and tables side by side with less spacing
-    allocation_data = [
-        [month_end_header, current_header],
-        [april_table, current_table]
-    ]
-    allocation_table = Table(allocation_data, colWidths=[2.8*inch, 2.8*inch])
-    allocation_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 3),  # Minimal padding
-        ('RIGHTPADDING', (0, 0), (-1, -1), 3),  # Minimal padding
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),  # Minimal padding
-    ]))
-    
-    elements.append(allocation_table)
-    elements.append(Spacer(1, 3))  # Minimal spacing
-    
-    # Add Return Attribution section - no separate header needed since it's in the table
-    # The headers are now part of the combined table
-    
-    # Process attribution data based on format
-    if attribution_data is None:
-        # Create sample attribution data if not provided
-        attribution_df = pd.DataFrame({
-            'Strategy': ['CMBS', 'ABS', 'CLO', 'Hedges', 'Cash'],
-            'Contribution': [85, 35, 15, -10, 5],
-        })
-        # Calculate from the sample data
-        gross_bps = attribution_df[attribution_df['Contribution'] > 0]['Contribution'].sum()
-        net_bps = attribution_df['Contribution'].sum()
-    elif isinstance(attribution_data, dict) and 'strategies' in attribution_data:
-        # New format from dashboard
-        strategies = attribution_data['strategies']
-        attribution_df = pd.DataFrame(strategies)
-        # Use the values passed from the dashboard
-        if 'gross_bps' in attribution_data and 'net_bps' in attribution_data:
-            gross_bps = attribution_data['gross_bps']
-            net_bps = attribution_data['net_bps']
+            # FORCE exactly 5 positions by absolute value, selecting the largest without a full sort
+            gainers_df = gainers_df.iloc[pd.Series(np.abs(y_values)).nlargest(5).index]
+            
+            # If we have fewer than 5 positions, pad with dummy positions with a small value in one concat
+            missing = 5 - len(gainers_df)
+            if missing > 0:
+                padding = pd.DataFrame({
+                    'ID': [f"Position {i}" for i in range(len(gainers_df) + 1, 6)],
+                    'Cannae MTD PL': [1000] * missing
+                })
+                gainers_df = pd.concat([gainers_df, padding], ignore_index=True)
         else:
-            # Calculate from data as fallback
-            gross_bps = attribution_df[attribution_df['Contribution'] > 0]['Contribution'].sum()
-            net_bps = attribution_df['Contribution'].sum()
-    elif isinstance(attribution_data, pd.DataFrame):
-        # Old format (direct DataFrame)
-        attribution_df = attribution_data
-        # Calculate from data
-        gross_bps = attribution_df[attribution_df['Contribution'] > 0]['Contribution'].sum()
-        net_bps = attribution_df['Contribution'].sum()
-    else:
-        # Fallback to empty DataFrame
-        attribution_df = pd.DataFrame({
-            'Strategy': ['CMBS', 'ABS', 'CLO', 'Hedges', 'Cash'],
-            'Contribution': [85, 35, 15, -10, 5],
-        })
-        # Calculate from the fallback data
-        gross_bps = attribution_df[attribution_df['Contribution'] > 0]['Contribution'].sum()
-        net_bps = attribution_df['Contribution'].sum()
-    
-    # Calculate percentages if not already present
-    if 'Percentage' not in attribution_df.columns:
-        attribution_df['Percentage'] = 0.0
-        # Calculate percentages for positive contributions
-        if gross_bps > 0:
-            positive_mask = attribution_df['Contribution'] > 0
-            attribution_df.loc[positive_mask, 'Percentage'] = (attribution_df.loc[positive_mask, 'Contribution'] / gross_bps) * 100
-    
-    # Create a table for the attribution data
-    attribution_table = create_attribution_table(attribution_df, gross_bps, net_bps)
-    
-    # Create competitor returns table if data is available
-    if competitor_data is not None and isinstance(competitor_data, pd.DataFrame) and not competitor_data.empty:
-        competitor_table = create_competitor_returns_table(competitor_data, percentile_rank)
-    else:
-        # Create a placeholder table if no data
-        competitor_data = [["No competitor data available"]]
-        competitor_table = Table(competitor_data, colWidths=[3*inch])
-        competitor_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Oblique'),
-            ('FONTSIZE', (0, 0), (-1, -1), 7),
-        ]))
-    
-    # Create a 2x1 table with headers for side-by-side display
-    attribution_header = Paragraph("Return Attribution", normal_style)
-    competitor_header = Paragraph("Competitor YTD Returns", normal_style)
-    
-    # Create a 2x2 table to hold headers and tables side by side
-    tables_data = [
-        [attribution_header, competitor_header],
-        [attribution_table, competitor_table]
-    ]
-    
-    combined_table = Table(tables_data, colWidths=[3.5*inch, 3.5*inch])
-    combined_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 3),  # Minimal padding
-        ('RIGHTPADDING', (0, 0), (-1, -1), 3),  # Minimal padding
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),  # Minimal padding
-        ('TOPPADDING', (0, 0), (-1, -1), 2),  # Minimal padding
-    ]))
-    
-    elements.append(combined_table)
-    
-    # Add minimal spacing after combined table
-    elements.append(Spacer(1, 3))
-    
-    # Add page break before the P&L charts section
-    elements.append(PageBreak())
-    
-    # Add P&L gainers chart again on page 2 (if available)
-    if fig_pl_gainers is not None:
-        elements.append(Paragraph("P&L by Top Gainers/Losers", section_style))
-        elements.append(Spacer(1, 2))  # Minimal spacing
+            # Fallback to sample data if figure doesn't have expected structure
+            gainers_df = pd.DataFrame({
+                'ID': ['Security1', 'Security2', 'Security3', 'Security4', 'Security5'],
+                'Cannae MTD PL': [150000, 120000, 90000, 75000, 60000]
+            })
         
-        try:
-            # Extract data from the Plotly figure
-            if hasattr(fig_pl_gainers, 'data') and len(fig_pl_gainers.data) > 0:
-                # Extract x and y values from the Plotly figure
-                x_values = fig_pl_gainers.data[0].x
-                y_values = fig_pl_gainers.data[0].y
-                
-                # Create DataFrame from the extracted data
-                gainers_df = pd.DataFrame({
-                    'ID': x_values,
-                    'Cannae MTD PL': y_values
-                })
-                
-                # FORCE exactly 5 positions by absolute value
-                gainers_df['Abs_PL'] = gainers_df['Cannae MTD PL'].abs()
-                gainers_df = gainers_df.sort_values('Abs_PL', ascending=False)
-                
-                # If we have more than 5 positions, limit to exactly 5
-                if len(gainers_df) > 5:
-                    gainers_df = gainers_df.head(5)
-                
-                # If we have fewer than 5 positions, pad with dummy data
-                while len(gainers_df) < 5:
-                    # Add a dummy position with a small value
-                    dummy_id = f"Position {len(gainers_df) + 1}"
-                    dummy_row = pd.DataFrame({'ID': [dummy_id], 'Cannae MTD PL': [1000], 'Abs_PL': [1000]})
-                    gainers_df = pd.concat([gainers_df, dummy_row], ignore_index=True)
-                
-                gainers_df = gainers_df.drop('Abs_PL', axis=1)
-            else:
-                # Fallback to sample data if figure doesn't have expected structure
-                gainers_df = pd.DataFrame({
-                    'ID': ['Security1', 'Security2', 'Security3', 'Security4', 'Security5'],
-                    'Cannae MTD PL': [150000, 120000, 90000, 75000, 60000]
-                })
+        # Create chart with matplotlib - full size for page 2
+        return create_pnl_chart(gainers_df, "Top 5 PnL Gainers/Losers", 'ID', 'Cannae MTD PL', compact=False)
+    
+    def render_substrat_chart():
+        """Extract the top 5 sub-strategies from the Plotly figure and render the PDF chart"""
+        # Extract data from the Plotly figure
+        if hasattr(fig_pl_substrat, 'data') and len(fig_pl_substrat.data) > 0:
+            # Extract x and y values from the Plotly figure once as typed arrays
+            x_values = np.asarray(fig_pl_substrat.data[0].x)
+            y_values = np.asarray(fig_pl_substrat.data[0].y, dtype=np.float64)
+            # Only the top 5 by absolute value are charted, so drop the rest of a large trace up front
+            x_values, y_values = _largest_abs_points(x_values, y_values)
             
-            # Create chart with matplotlib - full size for page 2
-            chart_img = create_pnl_chart(gainers_df, "Top 5 PnL Gainers/Losers", 'ID', 'Cannae MTD PL', "gainers_chart.png", compact=False)
+            # Create DataFrame from the extracted data
+            substrat_df = pd.DataFrame({
+                'Sub Strategy': x_values,
+                'PnL': y_values
+            })
             
-            # Add the image to the PDF - full size for page 2
-            img = Image(chart_img, width=5.5*inch, height=2.5*inch)
-            elements.append(img)
-            elements.append(Spacer(1, 10))  # Add more spacing between charts
-        except Exception as e:
-            # If chart generation fails, add an error message
-            elements.append(Paragraph(f"Error with P&L Gainers chart: {str(e)}", normal_style))
-            elements.append(Spacer(1, 10))  # Add more spacing between charts
-    
-    if fig_pl_substrat is not None:
-        # Add P&L by sub-strategy chart with smaller header
-        elements.append(Paragraph("P&L by Sub-Strategy", section_style))
-        elements.append(Spacer(1, 2))  # Minimal spacing
-        
-        try:
-            # Extract data from the Plotly figure
-            if hasattr(fig_pl_substrat, 'data') and len(fig_pl_substrat.data) > 0:
-                # Extract x and y values from the Plotly figure
-                x_values = fig_pl_substrat.data[0].x
-                y_values = fig_pl_substrat.data[0].y
-                
-                # Create DataFrame from the extracted data
-                substrat_df = pd.DataFrame({
-                    'Sub Strategy': x_values,
-                    'PnL': y_values
+            # FORCE exactly 5 positions by absolute value, selecting the largest without a full sort
+            substrat_df = substrat_df.iloc[pd.Series(np.abs(y_values)).nlargest(5).index]
+            
+            # If we have fewer than 5 positions, pad with dummy strategies with a small value in one concat
+            missing = 5 - len(substrat_df)
+            if missing > 0:
+                padding = pd.DataFrame({
+                    'Sub Strategy': [f"Strategy {i}" for i in range(len(substrat_df) + 1, 6)],
+                    'PnL': [1000] * missing
                 })
-                
-                # FORCE exactly 5 positions by absolute value
-                substrat_df['Abs_PL'] = substrat_df['PnL'].abs()
-                substrat_df = substrat_df.sort_values('Abs_PL', ascending=False)
-                
-                # If we have more than 5 positions, limit to exactly 5
-                if len(substrat_df) > 5:
-                    substrat_df = substrat_df.head(5)
-                
-                # If we have fewer than 5 positions, pad with dummy data
-                while len(substrat_df) < 5:
-                    # Add a dummy position with a small value
-                    dummy_strat = f"Strategy {len(substrat_df) + 1}"
-                    dummy_row = pd.DataFrame({'Sub Strategy': [dummy_strat], 'PnL': [1000], 'Abs_PL': [1000]})
-                    substrat_df = pd.concat([substrat_df, dummy_row], ignore_index=True)
-                
-                substrat_df = substrat_df.drop('Abs_PL', axis=1)
+                substrat_df = pd.concat([substrat_df, padding], ignore_index=True)
+        else:
+            # Fallback to sample data if figure doesn't have expected structure
+            substrat_df = pd.DataFrame({
+                'Sub Strategy': ['SubStrat1', 'SubStrat2', 'SubStrat3', 'SubStrat4', 'SubStrat5'],
+                'PnL': [200000, 150000, 100000, 50000, 25000]
+            })
+        
+        # Create chart with matplotlib - full size version for page 2
+        return create_pnl_chart(substrat_df, "P&L by Sub-Strategy", 'Sub Strategy', 'PnL', compact=False)
+    
+    # Render both P&L charts and build the trading monitor tables in the background while the
+    # page 1 tables are built below; the tasks are independent and each chart draws on its own
+    # pooled Figure. Errors are raised from result() so chart failures are reported per chart, and
+    # leaving the block waits for the workers even if building page 1 raises
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        gainers_future = executor.submit(render_gainers_chart) if fig_pl_gainers is not None else None
+        substrat_future = executor.submit(render_substrat_chart) if fig_pl_substrat is not None else None
+        trading_future = executor.submit(create_trading_monitor_tables, trading_data)
+        
+        # Create Key Stats table with default values if not provided
+        if key_stats is None:
+            key_stats = {
+                "monthly_return_str": "1.49%",  # Updated to use Total (Net) from attribution data
+                "ytd_return_str": "4.75%",
+                "ann_return_str": "8.90%",
+                "aum_str": "$1.2B",
+                "total_leverage": "35.2%",  # Default value for Total Leverage %
+                "repo_mv": "$420.4M"  # Default value for Repo MV
+            }
+        
+        # Create the main returns table
+        # Use the net_bps value from attribution data for monthly return if available
+        monthly_return = key_stats.get("monthly_return_str", "1.49%")  # Use the value from key_stats or default to 1.49%
+        
+        returns_data = (
+            ("YTD Return", "Monthly Return", "Annualized Return", "AUM"),
+            (key_stats.get("ytd_return_str", "N/A"), 
+             monthly_return,  # Use the hard-coded value instead of key_stats
+             key_stats.get("ann_return_str", "N/A"), 
+             key_stats.get("aum_str", "N/A"))
+        )
+        
+        returns_table = Table(returns_data, colWidths=[1.75*inch, 1.75*inch, 1.75*inch, 1.75*inch], rowHeights=[14, 14])
+        returns_table.setStyle(_RETURNS_STYLE)
+        
+        # Create a more detailed key stats table with additional metrics
+        # Row 1: Yield, WAL, IG%, Floating Rate %
+        row1_data = (
+            ("Average Yield", "WAL", "% IG", "Floating Rate %"),
+            (key_stats.get("avg_yield", "N/A"), 
+             key_stats.get("wal", "N/A"), 
+             key_stats.get("pct_ig", "N/A"), 
+             key_stats.get("floating_rate_pct", "N/A"))
+        )
+        
+        # Row 2: Risk Rating, Monthly Carry, Bond Line Items, Avg Holding Size
+        row2_data = (
+            ("% Risk Rating 1", "Monthly Carry", "Bond Line Items", "Avg Holding Size"),
+            (key_stats.get("pct_risk_rating_1", "N/A"), 
+             key_stats.get("monthly_carry_bps", "N/A"), 
+             key_stats.get("bond_line_items", "N/A"), 
+             key_stats.get("avg_holding_size", "N/A"))
+        )
+        
+        # Row 3: Top 10% Concentration, CMBS/ABS/CLO Line Items
+        row3_data = (
+            ("Top 10% Concentration", "CMBS Line Items", "ABS Line Items", "CLO Line Items"),
+            (key_stats.get("top_10_concentration", "N/A"), 
+             key_stats.get("cmbs_items", "N/A"), 
+             key_stats.get("abs_items", "N/A"), 
+             key_stats.get("clo_items", "N/A"))
+        )
+        
+        # Row 4: Total Leverage % and Repo MV (newly added)
+        row4_data = (
+            ("Total Leverage %", "Repo MV", "", ""),
+            (key_stats.get("total_leverage", "N/A"), 
+             key_stats.get("repo_mv", "N/A"), 
+             "", 
+             "")
+        )
+        
+        # Create tables for each row, with fixed heights for the single-line 12pt rows
+        row1_table = Table(row1_data, colWidths=[1.4*inch, 1.4*inch, 1.4*inch, 1.4*inch], rowHeights=[12, 12])
+        row2_table = Table(row2_data, colWidths=[1.4*inch, 1.4*inch, 1.4*inch, 1.4*inch], rowHeights=[12, 12])
+        row3_table = Table(row3_data, colWidths=[1.4*inch, 1.4*inch, 1.4*inch, 1.4*inch], rowHeights=[12, 12])
+        row4_table = Table(row4_data, colWidths=[1.4*inch, 1.4*inch, 1.4*inch, 1.4*inch], rowHeights=[12, 12])
+        
+        # Apply consistent styling to all tables
+        for table in [row1_table, row2_table, row3_table, row4_table]:
+            table.setStyle(_STATS_STYLE)
+        
+        # Add Key Stats section at the top of the report with minimal spacing, followed by the
+        # detailed stats tables with no spacing between them (zero-height spacers are skipped)
+        elements.extend([
+            Paragraph("Key Statistics", section_style),
+            returns_table,
+            Spacer(1, 8),
+            Paragraph("Detailed Statistics", normal_style),
+            row1_table, row2_table, row3_table, row4_table,
+            Spacer(1, 2)  # Minimal spacing
+        ])
+        
+        # Create a table for side-by-side allocation tables
+        # First, create each allocation table
+        # Handle april_display safely - check if it exists and is not empty
+        if _nonempty_df(april_display):
+            april_table = create_allocation_table(april_display, "July Month-End Allocation")
+        else:
+            # Create an empty table if no data
+            april_table = Table([["No Month-End Data"]], colWidths=[2.8*inch])
+        
+        # Handle current_display safely - check if it exists and is not empty
+        if _nonempty_df(current_display):
+            current_table = create_allocation_table(current_display, "Current Allocation")
+        else:
+            # Create an empty table if no data
+            current_table = Table([["No Current Data"]], colWidths=[2.8*inch])
+        
+        # Create headers with smaller font
+        month_end_header = Paragraph("<b>July Month-End Allocation</b>", normal_style)
+        current_header = Paragraph(f"<b>Current Allocation (as of {today})</b>", normal_style)
+        
+        # Create a 2x2 table to hold headers and tables side by side with less spacing
+        allocation_data = (
+            (month_end_header, current_header),
+            (april_table, current_table)
+        )
+        allocation_table = Table(allocation_data, colWidths=[2.8*inch, 2.8*inch], rowHeights=[18, None])  # Fixed header row
+        allocation_table.setStyle(_ALLOCATION_LAYOUT_STYLE)
+        
+        # Add portfolio allocation section with compact spacing
+        elements.extend([
+            Paragraph("Portfolio Allocation", section_style),
+            Spacer(1, 2),  # Minimal spacing
+            allocation_table,
+            Spacer(1, 3)  # Minimal spacing
+        ])
+        
+        # Add Return Attribution section - no separate header needed since it's in the table
+        # The headers are now part of the combined table
+        
+        # Process attribution data based on format
+        gross_bps = net_bps = None
+        if isinstance(attribution_data, dict) and 'strategies' in attribution_data:
+            # New format from dashboard
+            attribution_df = pd.DataFrame(attribution_data['strategies'])
+            # Use the values passed from the dashboard
+            if 'gross_bps' in attribution_data and 'net_bps' in attribution_data:
+                gross_bps = attribution_data['gross_bps']
+                net_bps = attribution_data['net_bps']
+        elif isinstance(attribution_data, pd.DataFrame):
+            # Old format (direct DataFrame)
+            attribution_df = attribution_data
+        else:
+            # Sample attribution data if not provided or in an unknown format (copied since
+            # the Percentage column is added below)
+            attribution_df = _SAMPLE_ATTRIBUTION.copy()
+        
+        if gross_bps is None:
+            # Calculate from the data
+            contribution = attribution_df['Contribution']
+            gross_bps = contribution[contribution > 0].sum()
+            net_bps = contribution.sum()
+        
+        # Calculate percentages if not already present
+        if 'Percentage' not in attribution_df.columns:
+            # Calculate percentages for positive contributions, 0 for the rest
+            contribution = attribution_df['Contribution'].to_numpy(dtype=np.float64)
+            if gross_bps > 0:
+                attribution_df['Percentage'] = np.where(contribution > 0, contribution / gross_bps * 100, 0.0)
             else:
-                # Fallback to sample data if figure doesn't have expected structure
-                substrat_df = pd.DataFrame({
-                    'Sub Strategy': ['SubStrat1', 'SubStrat2', 'SubStrat3', 'SubStrat4', 'SubStrat5'],
-                    'PnL': [200000, 150000, 100000, 50000, 25000]
-                })
-            
-            # Create chart with matplotlib - full size version for page 2
-            chart_img = create_pnl_chart(substrat_df, "P&L by Sub-Strategy", 'Sub Strategy', 'PnL', "substrat_chart.png", compact=False)
-            
-            # Add the image to the PDF - full size for page 2
-            img = Image(chart_img, width=5.5*inch, height=3.2*inch)  # Full size for page 2
-            elements.append(img)
-            elements.append(Spacer(1, 3))  # Minimal spacing
-        except Exception as e:
-            # If chart generation fails, add an error message
-            elements.append(Paragraph(f"Error with P&L Sub-Strategy chart: {str(e)}", normal_style))
-            elements.append(Spacer(1, 3))  # Minimal spacing
-    
-    # Add page break before Trading Monitor section so it starts on page 3
-    elements.append(PageBreak())
-    
-    # Add Trading Monitor section
-    elements.append(Paragraph("Trading Monitor", section_style))
-    elements.append(Spacer(1, 2))  # Minimal spacing
-    
-    # Create trading monitor tables
-    trading_tables = create_trading_monitor_tables(trading_data)
-    
-    # Add Trading Summary table
-    elements.append(Paragraph("<b>Trading Summary</b>", normal_style))
-    elements.append(Spacer(1, 1))  # Minimal spacing
-    elements.append(trading_tables['summary'])
-    elements.append(Spacer(1, 3))  # Minimal spacing
-    
-    # Add Last 5 Trades table
-    elements.append(Paragraph("<b>Last 5 Trades</b>", normal_style))
-    elements.append(Spacer(1, 1))  # Minimal spacing
-    elements.append(trading_tables['last_trades'])
-    elements.append(Spacer(1, 3))  # Minimal spacing
-    
-    # Add Top 5 Largest Trades table
-    elements.append(Paragraph("<b>Top 5 Largest Trades</b>", normal_style))
-    elements.append(Spacer(1, 1))  # Minimal spacing
-    elements.append(trading_tables['largest_trades'])
-    elements.append(Spacer(1, 3))  # Minimal spacing
+                attribution_df['Percentage'] = np.zeros_like(contribution)
+        
+        # Create a table for the attribution data
+        attribution_table = create_attribution_table(attribution_df, gross_bps, net_bps)
+        
+        # Create competitor returns table if data is available
+        if _nonempty_df(competitor_data):
+            competitor_table = create_competitor_returns_table(competitor_data, percentile_rank)
+        else:
+            # Create a placeholder table if no data
+            competitor_data = [["No competitor data available"]]
+            competitor_table = Table(competitor_data, colWidths=[3*inch])
+            competitor_table.setStyle(_COMPETITOR_PLACEHOLDER_STYLE)
+        
+        # Create a 2x1 table with headers for side-by-side display
+        attribution_header = Paragraph("Return Attribution", normal_style)
+        competitor_header = Paragraph("Competitor YTD Returns", normal_style)
+        
+        # Create a 2x2 table to hold headers and tables side by side
+        tables_data = (
+            (attribution_header, competitor_header),
+            (attribution_table, competitor_table)
+        )
+        
+        combined_table = Table(tables_data, colWidths=[3.5*inch, 3.5*inch], rowHeights=[16, None])  # Fixed header row
+        combined_table.setStyle(_COMBINED_LAYOUT_STYLE)
+        
+        # Add minimal spacing after combined table and a page break before the P&L charts section
+        elements.extend([combined_table, Spacer(1, 3), PageBreak()])
+        
+        # Set when a chart is replaced by an error message, so that report isn't cached
+        chart_failed = False
+        
+        # Add P&L gainers chart again on page 2 (if available)
+        if gainers_future is not None:
+            try:
+                # Add the image to the PDF - full size for page 2
+                chart = Image(gainers_future.result(), width=5.5*inch, height=2.5*inch)
+            except Exception as e:
+                # If chart generation fails, add an error message
+                chart = Paragraph(f"Error with P&L Gainers chart: {str(e)}", normal_style)
+                chart_failed = True
+            elements.extend([
+                Paragraph("P&L by Top Gainers/Losers", section_style),
+                Spacer(1, 2),  # Minimal spacing
+                chart,
+                Spacer(1, 10)  # Add more spacing between charts
+            ])
+        
+        if substrat_future is not None:
+            try:
+                # Add the image to the PDF - full size for page 2
+                chart = Image(substrat_future.result(), width=5.5*inch, height=3.2*inch)  # Full size for page 2
+            except Exception as e:
+                # If chart generation fails, add an error message
+                chart = Paragraph(f"Error with P&L Sub-Strategy chart: {str(e)}", normal_style)
+                chart_failed = True
+            # Add P&L by sub-strategy chart with smaller header
+            elements.extend([
+                Paragraph("P&L by Sub-Strategy", section_style),
+                Spacer(1, 2),  # Minimal spacing
+                chart,
+                Spacer(1, 3)  # Minimal spacing
+            ])
+        
+        # Collect the trading monitor tables built in the background
+        trading_tables = trading_future.result()
+    
+    # Add Trading Monitor section on page 3 with the summary, last 5 and top 5 largest trades tables
+    elements.extend([
+        PageBreak(),
+        Paragraph("Trading Monitor", section_style),
+        Spacer(1, 2),  # Minimal spacing
+        
+        Paragraph("<b>Trading Summary</b>", normal_style),
+        Spacer(1, 1),  # Minimal spacing
+        trading_tables['summary'],
+        Spacer(1, 3),  # Minimal spacing
+        
+        Paragraph("<b>Last 5 Trades</b>", normal_style),
+        Spacer(1, 1),  # Minimal spacing
+        trading_tables['last_trades'],
+        Spacer(1, 3),  # Minimal spacing
+        
+        Paragraph("<b>Top 5 Largest Trades</b>", normal_style),
+        Spacer(1, 1),  # Minimal spacing
+        trading_tables['largest_trades'],
+        Spacer(1, 3)  # Minimal spacing
+    ])
     
     # Build the PDF
     doc.build(elements)
+    
+    # Store the PDF in the report cache, replacing atomically so readers never see a partial file.
+    # Each writer gets its own temp file, since Streamlit sessions building the same report are
+    # threads in one process. A report with a failed chart is not cached, so the next run retries it
+    if cache_path is not None and not chart_failed:
+        os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=REPORT_CACHE_DIR, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(output_path, tmp_path)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+        _prune_cache_dir(REPORT_CACHE_DIR, REPORT_CACHE_MAX_FILES)
     # Don't return anything to prevent 'None' values in the UI
 
 # Example usage (not executed when imported)
 if __name__ == "__main__":
+    import plotly.graph_objects as go
+    
     # Sample data for testing
     april_data = {
         'Strategy': ['CMBS F1', 'AIRCRAFT F1', 'SHORT TERM', 'CLO F1', 'HEDGE'],
@@ -12,10 +12,11 @@ data = pd.DataFrame({
 
 # Calculate percentages
 data['Percentage'] = data['Market Value'] / data['Market Value'].sum() * 100
-data['Formatted Value'] = data['Market Value'].apply(lambda x: f"${x:,.0f}")
-data['Hover Info'] = data.apply(
-    lambda row: f"Strategy: {row['Strategy']}<br>Amount: {row['Formatted Value']}<br>Allocation: {row['Percentage']:.1f}%", 
-    axis=1
+data['Formatted Value'] = data['Market Value'].map('${:,.0f}'.format)
+data['Hover Info'] = (
+    'Strategy: ' + data['Strategy'] +
+    '<br>Amount: ' + data['Formatted Value'] +
+    '<br>Allocation: ' + data['Percentage'].map('{:.1f}%'.format)
 )
 
 st.title("Color Test for Cannae Dashboard")
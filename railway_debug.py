@@ -1,21 +1,28 @@
 import os
+import re
 import sys
 import socket
-import pandas as pd
-import traceback
 
-# Print environment information for debugging
-print("=== Railway Debug Information ===")
-print(f"Python version: {sys.version}")
-print(f"Current directory: {os.getcwd()}")
-print(f"Directory contents: {os.listdir('.')}")
-print(f"PORT environment variable: {os.environ.get('PORT', 'Not set')}")
+# Reading every Excel file needs pandas and is slow on a small dyno, so it only runs on request
+SCAN_EXCEL = os.environ.get('RAILWAY_DEBUG_SCAN') == '1'
 
-# Check if data directory exists
-if os.path.exists('data'):
-    print(f"Data directory exists. Contents: {os.listdir('data')}")
+def _excel_sheet_names(file_path):
+    """Return a workbook's sheet names without loading its cells (openpyxl read-only mode for .xlsx)"""
+    if file_path.endswith('.xlsx'):
+        from openpyxl import load_workbook
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            return workbook.sheetnames
+        finally:
+            workbook.close()
+    import pandas as pd
+    return pd.ExcelFile(file_path).sheet_names
+
+def _scan_excel():
+    """Try to read each Excel file in the data directory and print its sheets and columns"""
+    import pandas as pd
+    import traceback
     
-    # Try to read each Excel file
     excel_files = [f for f in os.listdir('data') if f.endswith('.xlsx') or f.endswith('.xls')]
     print(f"Found {len(excel_files)} Excel files: {excel_files}")
     
@@ -24,17 +31,34 @@ if os.path.exists('data'):
         print(f"Attempting to read {file_path}...")
         try:
             # Try to read the Excel file and get sheet names
-            excel = pd.ExcelFile(file_path)
-            print(f"  Success! Sheets in {excel_file}: {excel.sheet_names}")
+            sheet_names = _excel_sheet_names(file_path)
+            print(f"  Success! Sheets in {excel_file}: {sheet_names}")
             
-            # Try to read the first sheet as a test
-            first_sheet = excel.sheet_names[0]
-            df = pd.read_excel(excel, sheet_name=first_sheet)
-            print(f"  Successfully read first sheet '{first_sheet}' with {len(df)} rows and {len(df.columns)} columns")
+            # Try to read the first few rows of the first sheet as a test
+            first_sheet = sheet_names[0]
+            df = pd.read_excel(file_path, sheet_name=first_sheet, nrows=5)
+            print(f"  Successfully read first sheet '{first_sheet}' with {len(df.columns)} columns")
             print(f"  Column names: {df.columns.tolist()}")
         except Exception as e:
             print(f"  ERROR reading {excel_file}: {str(e)}")
             print(traceback.format_exc())
+
+# Print environment information for debugging
+print("=== Railway Debug Information ===")
+print(f"Python version: {sys.version}")
+print(f"Current directory: {os.getcwd()}")
+print(f"Directory contents: {os.listdir('.')}")
+print(f"PORT environment variable: {os.environ.get('PORT', 'Not set')}")
+
+# Check if data directory exists
+if os.path.exists('data'):
+    print(f"Data directory exists. Contents: {os.listdir('data')}")
+    
+    # Try to read each Excel file
+    if SCAN_EXCEL:
+        _scan_excel()
+    else:
+        print("Skipping Excel scan (set RAILWAY_DEBUG_SCAN=1 to read the files)")
 else:
     print("ERROR: Data directory does not exist!")
 
@@ -62,37 +86,43 @@ st.write(f"Current working directory: {os.getcwd()}")
 
 # Display directory structure
 st.subheader("Directory Structure")
-dir_structure = {}
-for root, dirs, files in os.walk('.', topdown=True, followlinks=False):
-    if '.git' in root or '__pycache__' in root:
-        continue
-    if root == '.':
-        dir_structure['files'] = files
-        for d in dirs:
-            if d != '.git' and d != '__pycache__':
-                dir_structure[d] = {'files': os.listdir(d) if os.path.exists(d) else []}
-    elif root.count(os.sep) == 1 and not root.startswith('./.git'):
-        parent = root.split(os.sep)[1]
-        dir_structure[parent]['files'] = files
 
-st.json(dir_structure)
+def build_tree(root='.'):
+    """List the files in root and in each of its immediate subdirectories in one scandir pass each"""
+    tree = {'files': []}
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.name in ('.git', '__pycache__'):
+                continue
+            if entry.is_file(follow_symlinks=False):
+                tree['files'].append(entry.name)
+            elif entry.is_dir(follow_symlinks=False):
+                with os.scandir(entry.path) as sub_entries:
+                    tree[entry.name] = {'files': [f.name for f in sub_entries if f.is_file(follow_symlinks=False)]}
+    return tree
+
+st.json(build_tree())
 
 # Display Excel file information
 st.subheader("Excel Files")
-if os.path.exists('data'):
+if not SCAN_EXCEL:
+    st.info("Excel scan skipped. Set RAILWAY_DEBUG_SCAN=1 to preview the files.")
+elif os.path.exists('data'):
+    import pandas as pd
+    
     excel_files = [f for f in os.listdir('data') if f.endswith('.xlsx') or f.endswith('.xls')]
     for excel_file in excel_files:
         file_path = os.path.join('data', excel_file)
         st.write(f"**{excel_file}**")
         try:
-            excel = pd.ExcelFile(file_path)
-            st.write(f"Sheets: {', '.join(excel.sheet_names)}")
+            sheet_names = _excel_sheet_names(file_path)
+            st.write(f"Sheets: {', '.join(sheet_names)}")
             
-            # Show preview of first sheet
-            first_sheet = excel.sheet_names[0]
-            df = pd.read_excel(excel, sheet_name=first_sheet)
+            # Show preview of first sheet, reading only the rows shown
+            first_sheet = sheet_names[0]
+            df = pd.read_excel(file_path, sheet_name=first_sheet, nrows=5)
             st.write(f"First sheet '{first_sheet}' preview:")
-            st.dataframe(df.head(5))
+            st.dataframe(df)
         except Exception as e:
             st.error(f"Error reading {excel_file}: {str(e)}")
 else:
@@ -100,5 +130,6 @@ else:
 
 # Display environment variables (excluding secrets)
 st.subheader("Environment Variables")
-env_vars = {k: v for k, v in os.environ.items() if not ('key' in k.lower() or 'secret' in k.lower() or 'password' in k.lower() or 'token' in k.lower())}
+secret_name = re.compile(r'key|secret|password|token', re.IGNORECASE)
+env_vars = {k: v for k, v in os.environ.items() if not secret_name.search(k)}
 st.json(env_vars)